@@ -29,6 +29,9 @@ from .prompts import (
     get_system_prompt
 )
 
+# Query cache
+from .semantic_cache import SemanticQueryCache
+
 # Main Agent
 from .agent import (
     AgentResponse,
@@ -60,6 +63,9 @@ __all__ = [
     "BASE_SYSTEM_PROMPT",
     "get_system_prompt",
     
+    # Query cache
+    "SemanticQueryCache",
+    
     # Main Agent
     "AgentResponse",
     "NexusLangChainAgent",
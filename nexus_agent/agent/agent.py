@@ -2,8 +2,10 @@
 Main Nexus Agent implementation using LangChain's create_agent
 """
 
+import asyncio
+import os
 from typing import Optional, Dict, Any, List
-from dataclasses import dataclass
+from dataclasses import dataclass, replace
 from langchain.agents import create_agent
 from langchain_core.messages import HumanMessage
 from langchain_openai import ChatOpenAI
@@ -20,6 +22,7 @@ from .middleware import (
     ToolErrorMiddleware
 )
 from .prompts import BASE_SYSTEM_PROMPT
+from .semantic_cache import SemanticQueryCache
 from ..storage.session_manager import SessionManager
 from ..storage.context_manager import ContextManager
 
@@ -104,6 +107,12 @@ class NexusLangChainAgent:
         # Initialize default context
         self.default_context_id = "default_conversation"
         
+        # Optional cache for replayed identical queries (stateless calls only)
+        if os.getenv("NEXUS_ENABLE_QUERY_CACHE"):
+            self.query_cache = SemanticQueryCache(tools=self.tools)
+        else:
+            self.query_cache = None
+        
         # Sprint 4: 初始化记忆管理
         if self.enable_memory:
             self.session_manager = SessionManager()
@@ -174,6 +183,23 @@ class NexusLangChainAgent:
         
         start_time = time.time()
         
+        # Replayed query: answers depend on history when memory is enabled,
+        # so only stateless calls are served from the cache
+        use_cache = self.query_cache is not None and not self.enable_memory
+        if use_cache:
+            cached = self.query_cache.get(
+                user_input,
+                user_id=user_id,
+                user_preferences=user_preferences
+            )
+            if cached is not None:
+                return replace(
+                    cached,
+                    context_id=context_id or self.default_context_id,
+                    duration=time.time() - start_time,
+                    metadata={**(cached.metadata or {}), "cache_hit": True}
+                )
+        
         # Sprint 4: 记忆管理
         history = []
         if self.enable_memory:
@@ -184,9 +210,16 @@ class NexusLangChainAgent:
             # 加载历史对话
             history = self.session_manager.get_conversation_history(session_id)
             
-            # 上下文压缩
+            # 上下文压缩：从上一轮的锚点开始，已裁掉的旧消息不再重复计数
             if history:
-                history = self.context_manager.compress_context(history)
+                history_length = len(history)
+                start = self.session_manager.get_context_start(session_id, history_length)
+                history, new_start = self.context_manager.compress_context_window(history, start)
+                if new_start != start:
+                    self.session_manager.set_context_start(session_id, history_length, new_start)
+                
+                # 去掉不发送的元数据，归档较早的助手长回复
+                history = self.context_manager.evict_context(history)
         
         # Use default context if none provided
         if context_id is None:
@@ -266,6 +299,14 @@ class NexusLangChainAgent:
                 }
             )
             
+            if use_cache:
+                self.query_cache.set(
+                    user_input,
+                    response,
+                    user_id=user_id,
+                    user_preferences=user_preferences
+                )
+            
             return response
             
         except Exception as e:
@@ -281,6 +322,68 @@ class NexusLangChainAgent:
             
             return response
     
+    async def process_message_async(self,
+                                    user_input: str,
+                                    context_id: str = None,
+                                    user_id: str = None,
+                                    session_id: str = None,
+                                    user_preferences: Dict[str, Any] = None) -> AgentResponse:
+        """
+        Process a user message without blocking the event loop
+        
+        Runs process_message in a worker thread, so independent conversations
+        can be awaited together and their LLM round-trips overlap.
+        
+        Args:
+            user_input: The user's input message
+            context_id: Optional conversation context ID
+            user_id: Optional user ID for session management
+            session_id: Optional session ID for memory management
+            user_preferences: Optional user preferences for context
+            
+        Returns:
+            AgentResponse with the agent's response
+        """
+        return await asyncio.to_thread(
+            self.process_message,
+            user_input,
+            context_id=context_id,
+            user_id=user_id,
+            session_id=session_id,
+            user_preferences=user_preferences
+        )
+    
+    def process_messages_batch(self,
+                               messages: List[str],
+                               user_id: str = None,
+                               user_preferences: Dict[str, Any] = None) -> List[AgentResponse]:
+        """
+        Process independent user messages concurrently
+        
+        Each message runs through process_message in a worker thread, so the
+        LLM round-trips overlap and the batch takes roughly as long as the
+        slowest message. Must not be called from inside a running event loop.
+        
+        Args:
+            messages: Independent user messages (no shared conversation)
+            user_id: Optional user ID applied to every message
+            user_preferences: Optional user preferences for context
+            
+        Returns:
+            AgentResponses in the same order as messages
+        """
+        async def _gather() -> List[AgentResponse]:
+            return await asyncio.gather(*[
+                self.process_message_async(
+                    message,
+                    user_id=user_id,
+                    user_preferences=user_preferences
+                )
+                for message in messages
+            ])
+        
+        return list(asyncio.run(_gather()))
+    
     def stream_message(self,
                       user_input: str,
                       context_id: str = None,
@@ -409,11 +512,10 @@ class NexusLangChainAgent:
         Returns:
             消息列表
         """
+        # 系统提示词由 create_agent 作为固定的 SystemMessage 发送，这里不再重复；
+        # 请求前缀在所有会话间保持一致，历史消息和当前消息都排在其后
         messages = []
         
-        # 添加系统提示词
-        messages.append(HumanMessage(content=BASE_SYSTEM_PROMPT))
-        
         # 添加历史消息
         if history:
             for msg in history:
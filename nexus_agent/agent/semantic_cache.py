@@ -0,0 +1,183 @@
+"""
+Query cache for Nexus Agent
+Exact-match and optional semantic (embedding similarity) caching of agent responses
+"""
+
+import copy
+import hashlib
+import json
+from typing import Optional, Dict, Any, List, Tuple
+
+
+class SemanticQueryCache:
+    """
+    Cache of agent responses for replayed queries
+
+    Two tiers:
+    - Exact tier: hash of (tool schema version, context, query) -> response
+    - Semantic tier (only when an embeddings model is given): a query whose
+      cosine similarity with a cached query in the same context is at least
+      `threshold` reuses that response
+
+    Responses are deep-copied on the way in and out, so callers never share
+    mutable fields (tool calls, metadata) with the cache or with each other
+    """
+
+    def __init__(self,
+                 tools: Optional[List[Any]] = None,
+                 embeddings: Optional[Any] = None,
+                 threshold: float = 0.95,
+                 max_size: int = 1000):
+        """
+        Initialize the query cache
+
+        Args:
+            tools: Tools bound to the agent; their names and descriptions
+                version the cache so tool changes invalidate old entries
+            embeddings: Optional model with embed_query() for the semantic tier
+            threshold: Minimum cosine similarity for a semantic hit
+            max_size: Maximum number of cached responses
+        """
+        self.embeddings = embeddings
+        self.threshold = threshold
+        self.max_size = max_size
+        self.schema_version = self._tool_schema_version(tools or [])
+
+        self.cache: Dict[str, Any] = {}
+        # context key -> list of (normalized query vector, exact key)
+        self.vectors: Dict[str, List[Tuple[Any, str]]] = {}
+
+        self.hits = 0
+        self.semantic_hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def _tool_schema_version(tools: List[Any]) -> str:
+        """Hash tool names and descriptions into a short version string"""
+        schema = "|".join(
+            f"{getattr(tool, 'name', tool)}:{getattr(tool, 'description', '')}"
+            for tool in tools
+        )
+        return hashlib.sha1(schema.encode("utf-8")).hexdigest()[:12]
+
+    def _context_key(self,
+                     user_id: Optional[str] = None,
+                     user_preferences: Optional[Dict[str, Any]] = None) -> str:
+        """Key for everything besides the query that shapes the response"""
+        payload = json.dumps(
+            [self.schema_version, user_id, user_preferences or {}],
+            ensure_ascii=False,
+            sort_keys=True,
+            default=str
+        )
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    @staticmethod
+    def _exact_key(context_key: str, query: str) -> str:
+        """Key for an exact (context, query) match"""
+        return hashlib.sha256(f"{context_key}\x00{query}".encode("utf-8")).hexdigest()
+
+    def _embed(self, query: str):
+        """Embed and L2-normalize a query so similarity is a plain dot product"""
+        import numpy as np
+
+        vector = np.asarray(self.embeddings.embed_query(query), dtype=np.float32)
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm else vector
+
+    def get(self,
+            query: str,
+            user_id: Optional[str] = None,
+            user_preferences: Optional[Dict[str, Any]] = None) -> Optional[Any]:
+        """
+        Look up a cached response
+
+        Args:
+            query: User query
+            user_id: User the query was issued for
+            user_preferences: User preferences passed to the agent
+
+        Returns:
+            Cached response or None if not found
+        """
+        context_key = self._context_key(user_id, user_preferences)
+        response = self.cache.get(self._exact_key(context_key, query))
+        if response is not None:
+            self.hits += 1
+            return copy.deepcopy(response)
+
+        candidates = self.vectors.get(context_key)
+        if self.embeddings is not None and candidates:
+            import numpy as np
+
+            query_vector = self._embed(query)
+            similarities = np.stack([vector for vector, _ in candidates]) @ query_vector
+            best = int(np.argmax(similarities))
+            if similarities[best] >= self.threshold:
+                response = self.cache.get(candidates[best][1])
+                if response is not None:
+                    self.hits += 1
+                    self.semantic_hits += 1
+                    return copy.deepcopy(response)
+
+        self.misses += 1
+        return None
+
+    def set(self,
+            query: str,
+            response: Any,
+            user_id: Optional[str] = None,
+            user_preferences: Optional[Dict[str, Any]] = None) -> None:
+        """
+        Cache a response for a query
+
+        Args:
+            query: User query
+            response: Agent response to cache
+            user_id: User the query was issued for
+            user_preferences: User preferences passed to the agent
+        """
+        context_key = self._context_key(user_id, user_preferences)
+        exact_key = self._exact_key(context_key, query)
+
+        # Evict oldest entry if cache is full (simple FIFO)
+        if exact_key not in self.cache and len(self.cache) >= self.max_size:
+            oldest_key = next(iter(self.cache))
+            del self.cache[oldest_key]
+            for key, entries in self.vectors.items():
+                self.vectors[key] = [entry for entry in entries if entry[1] != oldest_key]
+
+        already_cached = exact_key in self.cache
+        self.cache[exact_key] = copy.deepcopy(response)
+
+        if self.embeddings is not None:
+            entry = (self._embed(query), exact_key)
+            entries = self.vectors.setdefault(context_key, [])
+            if already_cached:
+                # Replace the existing row instead of adding a duplicate
+                entries[:] = [entry if key == exact_key else (vector, key)
+                              for vector, key in entries]
+            else:
+                entries.append(entry)
+
+    def clear(self) -> None:
+        """Clear all cached responses"""
+        self.cache.clear()
+        self.vectors.clear()
+        self.hits = 0
+        self.semantic_hits = 0
+        self.misses = 0
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get cache statistics"""
+        total_requests = self.hits + self.misses
+        hit_rate = self.hits / total_requests if total_requests > 0 else 0
+
+        return {
+            "size": len(self.cache),
+            "max_size": self.max_size,
+            "hits": self.hits,
+            "semantic_hits": self.semantic_hits,
+            "misses": self.misses,
+            "hit_rate": hit_rate,
+        }
@@ -64,20 +64,28 @@ class NexusEmbeddings:
             device=device
         )
         
+        # LangChain wrapper is created lazily and reused by every vector store
+        self._langchain_embeddings: Optional[Embeddings] = None
+        
         logger.info("Embeddings model initialized successfully")
     
     def get_embeddings_model(self) -> Embeddings:
         """
         Get a LangChain-compatible embeddings wrapper.
         
+        The wrapper is built once and cached, so vector stores sharing this
+        instance do not reload the model weights.
+        
         Returns:
             LangChain Embeddings instance wrapping the sentence-transformers model
         """
-        return HuggingFaceEmbeddings(
-            model_name=self.model_name,
-            model_kwargs={'device': self.device},
-            encode_kwargs=self.encode_kwargs,
-        )
+        if self._langchain_embeddings is None:
+            self._langchain_embeddings = HuggingFaceEmbeddings(
+                model_name=self.model_name,
+                model_kwargs={'device': self.device},
+                encode_kwargs=dict(self.encode_kwargs),
+            )
+        return self._langchain_embeddings
     
     def embed_query(self, text: str) -> List[float]:
         """
@@ -89,7 +97,11 @@ class NexusEmbeddings:
         Returns:
             List of float values representing the embedding vector
         """
-        embedding = self.model.encode(text, convert_to_numpy=True)
+        embedding = self.model.encode(
+            text,
+            convert_to_numpy=True,
+            **self.encode_kwargs
+        )
         return embedding.tolist()
     
     def embed_documents(self, texts: List[str]) -> List[List[float]]:
@@ -102,7 +114,11 @@ class NexusEmbeddings:
         Returns:
             List of embedding vectors
         """
-        embeddings = self.model.encode(texts, convert_to_numpy=True)
+        embeddings = self.model.encode(
+            texts,
+            convert_to_numpy=True,
+            **self.encode_kwargs
+        )
         return embeddings.tolist()
     
     def get_embedding_dimension(self) -> int:
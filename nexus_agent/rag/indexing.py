@@ -10,13 +10,44 @@ from .text_splitter import NexusTextSplitter
 from .embeddings import NexusEmbeddings
 from .vector_store import NexusVectorStore
 from langchain_core.documents import Document
-from typing import List, Optional, Dict, Any
+from typing import List, Optional, Dict, Any, Tuple
+from concurrent.futures import ThreadPoolExecutor
+import functools
 import logging
+import os
 import time
 
 logger = logging.getLogger(__name__)
 
 
+@functools.lru_cache(maxsize=4)
+def _get_embedder(
+    model_name: str,
+    device: str = "cpu",
+    batch_size: int = 64,
+) -> NexusEmbeddings:
+    """
+    Get a shared embeddings model, loading it only once per configuration.
+    
+    Pipelines built with the same model, device and batch size reuse one
+    loaded SentenceTransformer. encode() is safe to call from several
+    threads for small batches; add a lock if parallel encoding is needed.
+    
+    Args:
+        model_name: Name of the BGE embedding model
+        device: Device for embedding generation
+        batch_size: Number of texts encoded per model forward pass
+        
+    Returns:
+        Cached NexusEmbeddings instance
+    """
+    return NexusEmbeddings(
+        model_name=model_name,
+        device=device,
+        encode_kwargs={'batch_size': batch_size}
+    )
+
+
 class NexusIndexingPipeline:
     """
     Complete ETL pipeline for document indexing.
@@ -37,6 +68,9 @@ class NexusIndexingPipeline:
         embedding_device: str = "cpu",
         persist_directory: Optional[str] = "nexus_agent/data/chroma_db",
         collection_name: str = "nexus_knowledge_base",
+        embeddings: Optional[NexusEmbeddings] = None,
+        batch_size: int = 64,
+        max_workers: Optional[int] = None,
     ):
         """
         Initialize the indexing pipeline.
@@ -49,6 +83,11 @@ class NexusIndexingPipeline:
             embedding_device: Device for embedding generation
             persist_directory: Directory for vector store persistence
             collection_name: Name of the Chroma collection
+            embeddings: Preloaded embeddings model to share across pipelines
+                (a cached one is looked up from embedding_model if None)
+            batch_size: Number of chunks encoded per model forward pass
+            max_workers: Threads used to load and split files in parallel
+                (defaults to min(8, CPU count))
         """
         self.data_dir = data_dir
         self.chunk_size = chunk_size
@@ -57,6 +96,8 @@ class NexusIndexingPipeline:
         self.embedding_device = embedding_device
         self.persist_directory = persist_directory
         self.collection_name = collection_name
+        self.batch_size = batch_size
+        self.max_workers = max_workers or min(8, os.cpu_count() or 1)
         
         # Initialize components
         self.loader = NexusDocumentLoader(data_dir=data_dir)
@@ -64,10 +105,15 @@ class NexusIndexingPipeline:
             chunk_size=chunk_size,
             chunk_overlap=chunk_overlap
         )
-        self.embeddings = NexusEmbeddings(
-            model_name=embedding_model,
-            device=embedding_device
-        )
+        if embeddings is not None:
+            self.embeddings = embeddings
+            self.embedding_model = embeddings.model_name
+        else:
+            self.embeddings = _get_embedder(
+                embedding_model,
+                embedding_device,
+                batch_size
+            )
         self.vector_store = NexusVectorStore(
             embeddings=self.embeddings,
             collection_name=collection_name,
@@ -102,11 +148,14 @@ class NexusIndexingPipeline:
             print("Nexus Document Indexing Pipeline")
             print("=" * 60)
         
-        # Step 1: Load documents
+        # Step 1 + 2: Load and split documents, one file per worker thread
         if verbose:
             print("\n📄 Step 1: Loading documents...")
         
-        docs = self.loader.load_documents(file_paths)
+        if file_paths is None:
+            file_paths = self.loader._get_all_document_paths()
+        
+        docs, splits = self._load_and_split_files(file_paths)
         stats['loaded_documents'] = len(docs)
         
         if verbose:
@@ -123,18 +172,16 @@ class NexusIndexingPipeline:
                 print("\n⚠️  No documents found to index")
             return stats
         
-        # Step 2: Split documents
         if verbose:
             print("\n✂️  Step 2: Splitting documents into chunks...")
         
-        splits = self.splitter.split_documents(docs)
         stats['total_chunks'] = len(splits)
         
         if verbose:
             print(f"   ✓ Created {len(splits)} chunk(s)")
         
         # Get splitting statistics
-        split_stats = self.splitter.get_split_stats(docs)
+        split_stats = self.splitter.get_split_stats(docs, splits=splits)
         stats.update(split_stats)
         
         if verbose:
@@ -146,7 +193,14 @@ class NexusIndexingPipeline:
         if verbose:
             print("\n🔢 Step 3: Generating embeddings and storing in vector database...")
         
-        document_ids = self.vector_store.add_documents(splits)
+        # Embed all chunks in one batched call, then bulk-insert the vectors
+        texts = [split.page_content for split in splits]
+        vectors = self.embeddings.embed_documents(texts)
+        document_ids = self.vector_store.add_embeddings(
+            texts,
+            vectors,
+            metadatas=[split.metadata for split in splits]
+        )
         stats['indexed_documents'] = len(document_ids)
         
         if verbose:
@@ -184,6 +238,51 @@ class NexusIndexingPipeline:
         
         return stats
     
+    def _load_and_split_file(self, file_path: str) -> Tuple[List[Document], List[Document]]:
+        """
+        Load and split a single file.
+        
+        Args:
+            file_path: Path of the file to process
+            
+        Returns:
+            Tuple of (loaded documents, chunks)
+        """
+        docs = self.loader.load_documents([file_path])
+        return docs, self.splitter.split_documents(docs) if docs else []
+    
+    def _load_and_split_files(
+        self,
+        file_paths: List[str]
+    ) -> Tuple[List[Document], List[Document]]:
+        """
+        Load and split files in parallel, keeping the input file order.
+        
+        Files are independent, so reading and chunking overlap across a
+        thread pool; embedding happens afterwards in one batched call.
+        
+        Args:
+            file_paths: Paths of the files to process
+            
+        Returns:
+            Tuple of (all loaded documents, all chunks)
+        """
+        if isinstance(file_paths, str):
+            file_paths = [file_paths]
+        
+        docs: List[Document] = []
+        splits: List[Document] = []
+        if not file_paths:
+            return docs, splits
+        
+        workers = min(self.max_workers, len(file_paths))
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            for file_docs, file_splits in executor.map(self._load_and_split_file, file_paths):
+                docs.extend(file_docs)
+                splits.extend(file_splits)
+        
+        return docs, splits
+    
     def reindex_all(
         self,
         verbose: bool = True
@@ -290,6 +389,8 @@ class NexusIndexingPipeline:
             'chunk_overlap': self.chunk_overlap,
             'embedding_model': self.embedding_model,
             'embedding_device': self.embedding_device,
+            'batch_size': self.batch_size,
+            'max_workers': self.max_workers,
             'collection_count': collection_stats.get('count', 0),
             'collection_metadata': collection_stats.get('metadata', {}),
         }
@@ -0,0 +1,64 @@
+"""
+Maximal marginal relevance (MMR) module for Nexus Agent RAG system.
+
+Provides a vectorized MMR selection over candidate embeddings: vectors are
+normalized once and similarities are computed with matrix-vector products.
+"""
+
+from typing import List, Sequence
+
+import numpy as np
+
+
+def _normalize_rows(matrix: np.ndarray) -> np.ndarray:
+    """L2-normalize each row in place, leaving zero rows untouched."""
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    matrix /= norms
+    return matrix
+
+
+def mmr(
+    query_embedding: Sequence[float],
+    candidate_embeddings: Sequence[Sequence[float]],
+    k: int = 4,
+    lambda_mult: float = 0.5,
+) -> List[int]:
+    """
+    Select candidates by maximal marginal relevance.
+
+    Each step picks the candidate maximizing
+    ``lambda_mult * sim(query) - (1 - lambda_mult) * max sim(selected)``.
+    The running max similarity to the selected set is updated with one
+    matrix-vector product per step, so selection is O(k * N * d).
+
+    Args:
+        query_embedding: Query embedding vector
+        candidate_embeddings: Candidate embedding vectors
+        k: Number of candidates to select
+        lambda_mult: Balance between relevance (1.0) and diversity (0.0)
+
+    Returns:
+        Indices of the selected candidates, in selection order
+    """
+    candidates = np.array(candidate_embeddings, dtype=np.float32)
+    if k <= 0 or candidates.size == 0:
+        return []
+
+    candidates = _normalize_rows(candidates.reshape(len(candidates), -1))
+    query = _normalize_rows(np.array(query_embedding, dtype=np.float32).reshape(1, -1))[0]
+
+    sims_to_query = candidates @ query
+    k = min(k, len(candidates))
+
+    selected = [int(np.argmax(sims_to_query))]
+    max_sims = candidates @ candidates[selected[0]]
+
+    while len(selected) < k:
+        scores = lambda_mult * sims_to_query - (1 - lambda_mult) * max_sims
+        scores[selected] = -np.inf
+        best = int(np.argmax(scores))
+        selected.append(best)
+        max_sims = np.maximum(max_sims, candidates @ candidates[best])
+
+    return selected
@@ -10,7 +10,7 @@ from langchain_text_splitters import (
     MarkdownTextSplitter,
 )
 from langchain_core.documents import Document
-from typing import List, Literal, Dict, Any
+from typing import List, Literal, Dict, Any, Optional
 import logging
 
 logger = logging.getLogger(__name__)
@@ -130,12 +130,17 @@ class NexusTextSplitter:
         """
         return self.splitter.split_text(text)
     
-    def get_split_stats(self, documents: List[Document]) -> Dict[str, Any]:
+    def get_split_stats(
+        self,
+        documents: List[Document],
+        splits: Optional[List[Document]] = None
+    ) -> Dict[str, Any]:
         """
         Get statistics about document splitting.
         
         Args:
             documents: Original documents before splitting
+            splits: Chunks already produced from documents (split again if None)
             
         Returns:
             Dictionary with splitting statistics
@@ -149,7 +154,8 @@ class NexusTextSplitter:
                 'chunk_size_range': (0, 0),
             }
         
-        splits = self.split_documents(documents)
+        if splits is None:
+            splits = self.split_documents(documents)
         
         if not splits:
             return {
@@ -10,8 +10,11 @@ from langchain_core.vectorstores import VectorStore
 from langchain_core.documents import Document
 from typing import List, Optional, Dict, Any, Tuple
 import logging
+import uuid
 from pathlib import Path
 
+from .mmr import mmr
+
 logger = logging.getLogger(__name__)
 
 
@@ -89,12 +92,104 @@ class NexusVectorStore:
             logger.warning("No documents to add")
             return []
         
-        logger.info(f"Adding {len(documents)} documents to vector store...")
-        document_ids = self.vector_store.add_documents(documents=documents, ids=ids)
+        return self.add_texts_batch(
+            [doc.page_content for doc in documents],
+            metadatas=[doc.metadata for doc in documents],
+            ids=ids
+        )
+    
+    def add_texts_batch(
+        self,
+        texts: List[str],
+        metadatas: Optional[List[Dict[str, Any]]] = None,
+        ids: Optional[List[str]] = None,
+        batch_size: Optional[int] = None
+    ) -> List[str]:
+        """
+        Embed texts in a single pass and write them to the collection.
+        
+        All texts go through one embed_documents call (the model batches
+        internally), followed by bulk collection writes.
+        
+        Args:
+            texts: List of texts to add
+            metadatas: Optional list of metadata dicts, one per text
+            ids: Optional list of document IDs
+            batch_size: Maximum records per collection write (None for one write)
+            
+        Returns:
+            List of document IDs
+        """
+        if not texts:
+            logger.warning("No documents to add")
+            return []
+        
+        logger.info(f"Adding {len(texts)} documents to vector store...")
+        embeddings = self.vector_store.embeddings.embed_documents(list(texts))
+        document_ids = self.add_embeddings(
+            texts,
+            embeddings,
+            metadatas=metadatas,
+            ids=ids,
+            batch_size=batch_size
+        )
         logger.info(f"Successfully added {len(document_ids)} documents")
         
         return document_ids
     
+    def add_embeddings(
+        self,
+        texts: List[str],
+        embeddings: List[List[float]],
+        metadatas: Optional[List[Dict[str, Any]]] = None,
+        ids: Optional[List[str]] = None,
+        batch_size: Optional[int] = None
+    ) -> List[str]:
+        """
+        Write precomputed embeddings to the underlying Chroma collection.
+        
+        Args:
+            texts: Document texts
+            embeddings: Embedding vectors aligned with texts
+            metadatas: Optional list of metadata dicts, one per text
+            ids: Optional list of document IDs
+            batch_size: Maximum records per collection write (None for one write)
+            
+        Returns:
+            List of document IDs
+        """
+        if not texts:
+            return []
+        if ids is None:
+            ids = [str(uuid.uuid4()) for _ in texts]
+        if metadatas is None:
+            metadatas = [{}] * len(texts)
+        
+        collection = self.vector_store._collection
+        step = batch_size or len(texts)
+        
+        for start in range(0, len(texts), step):
+            batch = range(start, min(start + step, len(texts)))
+            # Chroma rejects empty metadata dicts, so write those records separately
+            with_meta = [i for i in batch if metadatas[i]]
+            without_meta = [i for i in batch if not metadatas[i]]
+            
+            if with_meta:
+                collection.upsert(
+                    ids=[ids[i] for i in with_meta],
+                    embeddings=[embeddings[i] for i in with_meta],
+                    documents=[texts[i] for i in with_meta],
+                    metadatas=[metadatas[i] for i in with_meta],
+                )
+            if without_meta:
+                collection.upsert(
+                    ids=[ids[i] for i in without_meta],
+                    embeddings=[embeddings[i] for i in without_meta],
+                    documents=[texts[i] for i in without_meta],
+                )
+        
+        return list(ids)
+    
     def similarity_search(
         self,
         query: str,
@@ -127,6 +222,49 @@ class NexusVectorStore:
         
         return results
     
+    def similarity_search_batch(
+        self,
+        queries: List[str],
+        k: int = 4,
+        filter: Optional[Dict[str, Any]] = None
+    ) -> List[List[Document]]:
+        """
+        Perform similarity search for several queries at once.
+        
+        All queries are embedded in one model call and sent to Chroma as a
+        single multi-query request.
+        
+        Args:
+            queries: Search query texts (supports Chinese)
+            k: Number of results to return per query
+            filter: Optional metadata filter (Chroma where clause)
+            
+        Returns:
+            One list of retrieved Document objects per query, in query order
+        """
+        if not queries:
+            return []
+        
+        logger.debug(f"Batch searching {len(queries)} queries (k={k})")
+        
+        query_embeddings = self.vector_store.embeddings.embed_documents(queries)
+        results = self.vector_store._collection.query(
+            query_embeddings=query_embeddings,
+            n_results=k,
+            where=filter or None,
+            include=["documents", "metadatas"],
+        )
+        
+        return [
+            [
+                Document(id=doc_id, page_content=content, metadata=metadata or {})
+                for doc_id, content, metadata in zip(ids, documents, metadatas)
+            ]
+            for ids, documents, metadatas in zip(
+                results["ids"], results["documents"], results["metadatas"]
+            )
+        ]
+    
     def similarity_search_with_score(
         self,
         query: str,
@@ -217,21 +355,35 @@ class NexusVectorStore:
         """
         logger.debug(f"MMR search for: {query[:100]}... (k={k}, fetch_k={fetch_k})")
         
-        if filter:
-            results = self.vector_store.max_marginal_relevance_search(
-                query=query,
-                k=k,
-                fetch_k=fetch_k,
-                lambda_mult=lambda_mult,
-                filter=filter
-            )
-        else:
-            results = self.vector_store.max_marginal_relevance_search(
-                query=query,
-                k=k,
-                fetch_k=fetch_k,
-                lambda_mult=lambda_mult
+        # Fetch candidates with their stored embeddings and rerank them with
+        # the vectorized MMR instead of re-deriving similarities per candidate
+        query_embedding = self.vector_store.embeddings.embed_query(query)
+        candidates = self.vector_store._collection.query(
+            query_embeddings=[query_embedding],
+            n_results=fetch_k,
+            where=filter or None,
+            include=["documents", "metadatas", "embeddings"],
+        )
+        
+        candidate_ids = candidates["ids"][0]
+        if not candidate_ids:
+            logger.debug("Found 0 MMR results")
+            return []
+        
+        selected = mmr(
+            query_embedding,
+            candidates["embeddings"][0],
+            k=k,
+            lambda_mult=lambda_mult
+        )
+        results = [
+            Document(
+                id=candidate_ids[i],
+                page_content=candidates["documents"][0][i],
+                metadata=candidates["metadatas"][0][i] or {},
             )
+            for i in selected
+        ]
         
         logger.debug(f"Found {len(results)} MMR results")
         return results
@@ -3,22 +3,46 @@
 管理对话上下文和 Token 预算
 """
 
+import bisect
+import itertools
+import os
+import re
 import tiktoken
 from typing import List, Dict, Optional, Tuple
 from nexus_agent.config.settings import config
 
+# encode_batch 每次调用都会新建线程池，文本较少时逐条编码更快
+_MIN_BATCH_ENCODE = 64
+_ENCODE_THREADS = min(8, os.cpu_count() or 1)
+
+_RE_CJK = re.compile(r'[\u4e00-\u9fff]')
+
+# 归档后的旧助手回复末尾的标记
+_ARCHIVED_SUFFIX = "…（已归档）"
+
+
+def _approximate_tokens(text: str) -> int:
+    """按字符数估算 Token 数：每个汉字约 1 个 Token，其他字符约 4 个一个 Token"""
+    cjk_chars = len(_RE_CJK.findall(text))
+    return cjk_chars + (len(text) - cjk_chars + 3) // 4
+
 
 class ContextManager:
     """上下文管理器"""
     
     def __init__(self):
         """初始化上下文管理器"""
-        # 初始化 tokenizer（使用 GPT-4 的编码）
+        # 初始化 tokenizer（使用 GPT-4 的编码），只加载一次
         try:
             self.encoding = tiktoken.encoding_for_model("gpt-4")
-        except:
-            # 如果无法获取，使用默认编码
-            self.encoding = tiktoken.get_encoding("cl100k_base")
+        except Exception:
+            try:
+                # 如果无法获取，使用默认编码
+                self.encoding = tiktoken.get_encoding("cl100k_base")
+            except Exception as e:
+                # 编码文件无法加载（如离线环境），退回按字符数估算
+                print(f"⚠️  tiktoken 编码加载失败，使用字符数估算 Token: {e}")
+                self.encoding = None
     
     def count_tokens(self, text: str) -> int:
         """
@@ -30,36 +54,73 @@ class ContextManager:
         Returns:
             Token 数量
         """
+        if self.encoding is None:
+            return _approximate_tokens(text)
         return len(self.encoding.encode(text))
     
-    def count_messages_tokens(self, messages: List[Dict]) -> int:
+    def count_tokens_many(self, texts: List[str]) -> List[int]:
         """
-        计算消息列表的 Token 数量
+        批量计算多段文本的 Token 数量
+        
+        文本较多时使用 encode_batch 多线程编码（tiktoken 编码时释放 GIL）
         
         Args:
-            messages: 消息列表
+            texts: 文本列表
             
         Returns:
-            总 Token 数量
+            每段文本的 Token 数量
+        """
+        if self.encoding is None:
+            return [_approximate_tokens(text) for text in texts]
+        if len(texts) < _MIN_BATCH_ENCODE:
+            return [len(self.encoding.encode(text)) for text in texts]
+        return [
+            len(tokens)
+            for tokens in self.encoding.encode_batch(texts, num_threads=_ENCODE_THREADS)
+        ]
+    
+    def count_message_tokens_each(self, messages: List[Dict]) -> List[int]:
         """
-        total_tokens = 0
+        分别计算每条消息的 Token 数量（含每条消息的固定开销）
         
-        for message in messages:
-            # 每条消息有固定的开销（约 4 tokens）
-            total_tokens += 4
+        Args:
+            messages: 消息列表
             
-            # 计算角色和内容的 tokens
-            for key, value in message.items():
+        Returns:
+            每条消息的 Token 数量
+        """
+        # 收集角色和内容等字段，一次批量计数
+        texts = []
+        owners = []
+        for index, message in enumerate(messages):
+            for value in message.values():
                 if isinstance(value, str):
-                    total_tokens += self.count_tokens(value)
+                    texts.append(value)
+                    owners.append(index)
                 elif isinstance(value, dict):
                     # 处理元数据等字典类型
-                    total_tokens += self.count_tokens(str(value))
+                    texts.append(str(value))
+                    owners.append(index)
         
-        # 添加回复前缀的开销
-        total_tokens += 3
+        # 每条消息有固定的开销（约 4 tokens）
+        counts = [4] * len(messages)
+        for index, tokens in zip(owners, self.count_tokens_many(texts)):
+            counts[index] += tokens
         
-        return total_tokens
+        return counts
+    
+    def count_messages_tokens(self, messages: List[Dict]) -> int:
+        """
+        计算消息列表的 Token 数量
+        
+        Args:
+            messages: 消息列表
+            
+        Returns:
+            总 Token 数量
+        """
+        # 添加回复前缀的开销
+        return sum(self.count_message_tokens_each(messages)) + 3
     
     def check_token_budget(
         self,
@@ -103,37 +164,65 @@ class ContextManager:
         Returns:
             压缩后的消息列表
         """
+        compressed, _ = self.compress_context_window(messages, max_tokens=max_tokens)
+        return compressed
+    
+    def compress_context_window(
+        self,
+        messages: List[Dict],
+        start: int = 0,
+        max_tokens: Optional[int] = None
+    ) -> Tuple[List[Dict], int]:
+        """
+        从锚点开始压缩上下文
+        
+        消息只会追加，满足预算的最长后缀的起点只会后移，所以上一轮裁掉的
+        messages[:start] 不必再参与计数，结果与压缩完整列表一致。
+        
+        Args:
+            messages: 原始消息列表
+            start: 上一轮保留窗口的起始位置（锚点）
+            max_tokens: 最大 Token 数（默认使用配置）
+            
+        Returns:
+            (压缩后的消息列表, 新的锚点)
+        """
         if max_tokens is None:
             max_tokens = config.max_context_tokens
         
-        # 检查是否需要压缩
-        is_over_budget, current_tokens = self.check_token_budget(messages, max_tokens)
+        window = messages[start:]
         
-        if not is_over_budget:
-            return messages
+        # 每条消息只计数一次，后续步骤都基于这些计数
+        token_counts = self.count_message_tokens_each(window)
+        current_tokens = sum(token_counts) + 3
+        
+        # 检查是否需要压缩
+        if current_tokens <= max_tokens:
+            return window, start
         
         print(f"⚠️  上下文超限: {current_tokens} tokens > {max_tokens} tokens")
         print("🔄 开始压缩上下文...")
         
         # 策略 1: 保留最近的 N 条消息
-        compressed = self._keep_recent_messages(messages, max_tokens)
+        compressed = self._keep_recent_messages(window, max_tokens, token_counts)
+        dropped = len(window) - len(compressed)
+        final_tokens = sum(token_counts[dropped:]) + 3
         
         # 检查是否还需要进一步压缩
-        is_over_budget, new_tokens = self.check_token_budget(compressed, max_tokens)
-        
-        if is_over_budget:
+        if final_tokens > max_tokens:
             # 策略 2: 生成摘要（简化版：只保留最关键的消息）
             compressed = self._generate_summary(compressed, max_tokens)
+            final_tokens = self.count_messages_tokens(compressed)
         
-        final_tokens = self.count_messages_tokens(compressed)
         print(f"✅ 压缩完成: {current_tokens} -> {final_tokens} tokens")
         
-        return compressed
+        return compressed, start + dropped
     
     def _keep_recent_messages(
         self,
         messages: List[Dict],
-        max_tokens: int
+        max_tokens: int,
+        token_counts: Optional[List[int]] = None
     ) -> List[Dict]:
         """
         保留最近的 N 条消息
@@ -141,25 +230,21 @@ class ContextManager:
         Args:
             messages: 原始消息列表
             max_tokens: 最大 Token 数
+            token_counts: 每条消息的 Token 数（可选，未提供时重新计算）
             
         Returns:
             保留的消息列表
         """
-        # 从最近的开始，逐步添加直到接近预算
-        result = []
+        if token_counts is None:
+            token_counts = self.count_message_tokens_each(messages)
         
-        # 从后往前遍历（保留最新的消息）
-        for message in reversed(messages):
-            # 临时添加这条消息
-            temp = [message] + result
-            tokens = self.count_messages_tokens(temp)
-            
-            if tokens <= max_tokens:
-                result = temp
-            else:
-                break
+        # 前缀和：保留 messages[k:] 需要 prefix_sums[-1] - prefix_sums[k] + 3 个 Token
+        prefix_sums = [0, *itertools.accumulate(token_counts)]
         
-        return result
+        # 二分查找满足预算的最小 k，即保留尽可能多的最新消息
+        start = bisect.bisect_left(prefix_sums, prefix_sums[-1] + 3 - max_tokens)
+        
+        return messages[start:]
     
     def _generate_summary(
         self,
@@ -192,6 +277,55 @@ class ContextManager:
         
         return result
     
+    def evict_context(
+        self,
+        messages: List[Dict],
+        keep_recent: int = 10,
+        preview_chars: int = 200
+    ) -> List[Dict]:
+        """
+        发送给 LLM 前精简上下文
+        
+        策略：
+        1. 只保留 role 和 content，时间戳、工具调用等元数据不会发送给 LLM
+        2. 最近 keep_recent 条之前的助手回复只保留前 preview_chars 个字符并标记为已归档，
+           用户消息保持完整
+        
+        对结果再次调用不会产生变化。
+        
+        Args:
+            messages: 消息列表（通常是 compress_context_window 保留的窗口）
+            keep_recent: 保持完整的最近消息数
+            preview_chars: 归档的助手回复保留的字符数
+            
+        Returns:
+            精简后的消息列表
+        """
+        cutoff = len(messages) - keep_recent
+        evicted = []
+        
+        for index, message in enumerate(messages):
+            role = message.get("role")
+            content = message.get("content")
+            archived = bool(message.get("_archived"))
+            
+            if (
+                index < cutoff
+                and role == "assistant"
+                and not archived
+                and isinstance(content, str)
+                and len(content) > preview_chars
+            ):
+                content = content[:preview_chars] + _ARCHIVED_SUFFIX
+                archived = True
+            
+            slim = {"role": role, "content": content}
+            if archived:
+                slim["_archived"] = True
+            evicted.append(slim)
+        
+        return evicted
+    
     def format_messages_for_llm(
         self,
         messages: List[Dict]
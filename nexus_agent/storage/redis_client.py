@@ -4,20 +4,47 @@ Redis 客户端 - Sprint 4
 """
 
 import json
-from typing import Dict, List, Optional, Any
+from typing import Dict, Iterator, List, Optional, Any, Tuple
 from datetime import datetime
 import redis
 from redis.connection import ConnectionPool
 from nexus_agent.config.settings import config
 
+# 可选的 orjson：编解码比标准库 json 快数倍，输出仍是 UTF-8 JSON，已有数据无需迁移
+try:
+    import orjson
+    _orjson_available = True
+except ImportError:
+    orjson = None
+    _orjson_available = False
+
+
+def _dumps(data: Any):
+    """序列化为 JSON（有 orjson 时返回 UTF-8 字节，与 ensure_ascii=False 的输出一致）"""
+    if _orjson_available:
+        return orjson.dumps(data, option=orjson.OPT_NON_STR_KEYS)
+    return json.dumps(data, ensure_ascii=False)
+
+
+_loads = orjson.loads if _orjson_available else json.loads
+
+# 清空历史时历史序号的跳跃量，大于任何 max_history_length（上限 1000），
+# 使所有进程缓存的历史副本都按完整读取处理
+_HISTORY_SEQ_CLEAR_STEP = 1 << 20
+
 
 class RedisClient:
     """Redis 客户端封装"""
     
-    def __init__(self):
-        """初始化 Redis 连接"""
+    def __init__(self, connection_pool: Optional[ConnectionPool] = None):
+        """
+        初始化 Redis 连接
+        
+        Args:
+            connection_pool: 共享的连接池（可选），不传则创建新的连接池
+        """
         # 创建连接池
-        self.pool = ConnectionPool(
+        self.pool = connection_pool or ConnectionPool(
             host=config.redis_host,
             port=config.redis_port,
             db=config.redis_db,
@@ -53,7 +80,7 @@ class RedisClient:
         data = self.client.get(key)
         
         if data:
-            return json.loads(data)
+            return _loads(data)
         return None
     
     def save_session(self, session_id: str, session_data: Dict) -> bool:
@@ -73,7 +100,7 @@ class RedisClient:
             self.client.setex(
                 key,
                 config.session_ttl,
-                json.dumps(session_data, ensure_ascii=False)
+                _dumps(session_data)
             )
             return True
         except Exception as e:
@@ -98,20 +125,11 @@ class RedisClient:
         key = f"history:{session_id}"
         
         try:
-            # 获取所有消息
-            messages = self.client.lrange(key, 0, -1)
-            
-            # 反转列表（Redis 返回的是从旧到新）
-            messages = messages[::-1]
+            # 列表头部是最新消息，有限制时只取最近的 limit 条
+            messages = self.client.lrange(key, 0, limit - 1 if limit else -1)
             
-            # 解析 JSON
-            history = [json.loads(msg) for msg in messages]
-            
-            # 应用限制
-            if limit:
-                history = history[-limit:]
-            
-            return history
+            # 反转为从旧到新并解析 JSON
+            return [_loads(msg) for msg in reversed(messages)]
         except Exception as e:
             print(f"❌ 获取对话历史失败: {e}")
             return []
@@ -145,22 +163,107 @@ class RedisClient:
         }
         
         try:
-            # 添加到列表头部
-            self.client.lpush(key, json.dumps(message, ensure_ascii=False))
-            
-            # 设置过期时间
-            self.client.expire(key, config.session_ttl)
-            
-            # 限制历史长度
-            max_length = config.max_history_length
-            if max_length:
-                self.client.ltrim(key, 0, max_length - 1)
-            
+            self._push_history(session_id, [_dumps(message)])
             return True
         except Exception as e:
             print(f"❌ 添加消息失败: {e}")
             return False
     
+    def add_messages_bulk(self, session_id: str, messages: List[Dict]) -> bool:
+        """
+        批量添加消息到对话历史（MULTI/EXEC 一次往返）
+        
+        Args:
+            session_id: 会话 ID
+            messages: 消息列表，每条包含 role、content 和可选的 metadata
+            
+        Returns:
+            是否添加成功
+        """
+        if not messages:
+            return True
+        
+        payloads = [
+            _dumps({
+                "role": message["role"],
+                "content": message["content"],
+                "timestamp": datetime.now().isoformat(),
+                "metadata": message.get("metadata") or {}
+            })
+            for message in messages
+        ]
+        
+        try:
+            self._push_history(session_id, payloads)
+            return True
+        except Exception as e:
+            print(f"❌ 批量添加消息失败: {e}")
+            return False
+    
+    def _push_history(self, session_id: str, payloads: List) -> None:
+        """
+        在同一个 MULTI/EXEC 事务中写入消息并递增历史序号
+        
+        历史序号与列表内容原子地一起变化，读取方可以据此判断新增了哪些消息
+        
+        Args:
+            session_id: 会话 ID
+            payloads: 已序列化的消息，按时间从旧到新
+        """
+        key = f"history:{session_id}"
+        seq_key = f"history_seq:{session_id}"
+        
+        # 与逐条添加顺序一致：依次添加到列表头部
+        pipe = self.client.pipeline()
+        pipe.lpush(key, *payloads)
+        pipe.incrby(seq_key, len(payloads))
+        pipe.expire(key, config.session_ttl)
+        pipe.expire(seq_key, config.session_ttl)
+        
+        # 限制历史长度
+        max_length = config.max_history_length
+        if max_length:
+            pipe.ltrim(key, 0, max_length - 1)
+        
+        pipe.execute()
+    
+    def get_history_seq(self, session_id: str) -> Optional[int]:
+        """
+        获取历史序号：每写入一条消息加 1，清空历史时跳过一大段，只增不减
+        
+        Args:
+            session_id: 会话 ID
+            
+        Returns:
+            历史序号，会话不存在时返回 None
+        """
+        pipe = self.client.pipeline()
+        pipe.exists(f"session:{session_id}")
+        pipe.get(f"history_seq:{session_id}")
+        exists, seq = pipe.execute()
+        return int(seq or 0) if exists else None
+    
+    def get_history_snapshot(
+        self,
+        session_id: str,
+        limit: Optional[int] = None
+    ) -> Tuple[int, List[Dict]]:
+        """
+        在同一个事务中读取历史序号和最近的消息
+        
+        Args:
+            session_id: 会话 ID
+            limit: 限制返回的消息数量（可选）
+            
+        Returns:
+            (历史序号, 从旧到新的消息列表)
+        """
+        pipe = self.client.pipeline()
+        pipe.get(f"history_seq:{session_id}")
+        pipe.lrange(f"history:{session_id}", 0, limit - 1 if limit else -1)
+        seq, messages = pipe.execute()
+        return int(seq or 0), [_loads(msg) for msg in reversed(messages)]
+    
     def clear_history(self, session_id: str) -> bool:
         """
         清空对话历史
@@ -171,9 +274,14 @@ class RedisClient:
         Returns:
             是否清空成功
         """
-        key = f"history:{session_id}"
+        seq_key = f"history_seq:{session_id}"
         try:
-            self.client.delete(key)
+            # 删除历史的同时推进历史序号，其他进程缓存的历史副本随之失效
+            pipe = self.client.pipeline()
+            pipe.delete(f"history:{session_id}")
+            pipe.incrby(seq_key, _HISTORY_SEQ_CLEAR_STEP)
+            pipe.expire(seq_key, config.session_ttl)
+            pipe.execute()
             return True
         except Exception as e:
             print(f"❌ 清空历史失败: {e}")
@@ -193,12 +301,60 @@ class RedisClient:
             # 删除会话信息
             self.client.delete(f"session:{session_id}")
             # 删除对话历史
-            self.client.delete(f"history:{session_id}")
+            self.client.delete(f"history:{session_id}", f"history_seq:{session_id}")
             return True
         except Exception as e:
             print(f"❌ 删除会话失败: {e}")
             return False
     
+    def delete_sessions_bulk(self, session_ids: List[str]) -> bool:
+        """
+        批量删除会话（所有删除命令通过管道一次往返发送）
+        
+        Args:
+            session_ids: 会话 ID 列表
+            
+        Returns:
+            是否删除成功
+        """
+        if not session_ids:
+            return True
+        
+        try:
+            pipe = self.client.pipeline(transaction=False)
+            for session_id in session_ids:
+                # 同时删除会话信息和对话历史
+                pipe.delete(
+                    f"session:{session_id}",
+                    f"history:{session_id}",
+                    f"history_seq:{session_id}"
+                )
+            pipe.execute()
+            return True
+        except Exception as e:
+            print(f"❌ 批量删除会话失败: {e}")
+            return False
+    
+    def iter_session_ids(self, prefix: str = "", keyspace: str = "session") -> Iterator[str]:
+        """
+        增量遍历会话 ID（SCAN MATCH，不会像 KEYS 那样阻塞 Redis）
+        
+        Args:
+            prefix: 会话 ID 前缀，只匹配以此开头的会话
+            keyspace: 键空间，"session" 为会话信息，"history" 为对话历史
+            
+        Yields:
+            会话 ID（去重）
+        """
+        key_prefix = f"{keyspace}:"
+        # SCAN 可能多次返回同一个键
+        seen = set()
+        for key in self.client.scan_iter(match=f"{key_prefix}{prefix}*", count=500):
+            session_id = key[len(key_prefix):]
+            if session_id not in seen:
+                seen.add(session_id)
+                yield session_id
+    
     def get_all_sessions(self) -> List[Dict]:
         """
         获取所有会话列表
@@ -207,20 +363,18 @@ class RedisClient:
             会话列表
         """
         try:
-            # 获取所有 session key
-            keys = self.client.keys("session:*")
+            session_ids = list(self.iter_session_ids())
+            if not session_ids:
+                return []
             
-            sessions = []
-            for key in keys:
-                session_id = key.split(":")[1]
-                session_data = self.get_session(session_id)
-                if session_data:
-                    sessions.append({
-                        "session_id": session_id,
-                        **session_data
-                    })
+            # 一次 MGET 取回所有会话数据
+            values = self.client.mget([f"session:{session_id}" for session_id in session_ids])
             
-            return sessions
+            return [
+                {"session_id": session_id, **_loads(data)}
+                for session_id, data in zip(session_ids, values)
+                if data
+            ]
         except Exception as e:
             print(f"❌ 获取会话列表失败: {e}")
             return []
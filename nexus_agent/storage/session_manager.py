@@ -3,11 +3,17 @@
 管理用户会话和对话历史
 """
 
+import threading
 import uuid
-from typing import Dict, Optional, List
+from collections import OrderedDict
+from typing import Dict, Optional, List, Tuple
 from datetime import datetime
+from nexus_agent.config.settings import config
 from .redis_client import get_redis_client
 
+# 本进程内缓存对话历史的会话数（最近使用）
+_HISTORY_CACHE_SIZE = 256
+
 
 class SessionManager:
     """会话管理器"""
@@ -15,6 +21,10 @@ class SessionManager:
     def __init__(self):
         """初始化会话管理器"""
         self.redis = get_redis_client()
+        
+        # 会话 ID -> (历史序号, 对话历史)
+        self._history_cache: "OrderedDict[str, Tuple[int, List[Dict]]]" = OrderedDict()
+        self._history_lock = threading.Lock()
     
     def create_session(
         self,
@@ -83,12 +93,13 @@ class SessionManager:
         # 保存更新
         return self.redis.save_session(session_id, session_data)
     
-    def increment_message_count(self, session_id: str) -> bool:
+    def increment_message_count(self, session_id: str, count: int = 1) -> bool:
         """
         增加消息计数
         
         Args:
             session_id: 会话 ID
+            count: 增加的消息数
             
         Returns:
             是否更新成功
@@ -97,11 +108,54 @@ class SessionManager:
         if not session_data:
             return False
         
-        session_data["message_count"] = session_data.get("message_count", 0) + 1
+        session_data["message_count"] = session_data.get("message_count", 0) + count
         session_data["last_active"] = datetime.now().isoformat()
         
         return self.redis.save_session(session_id, session_data)
     
+    def get_context_start(self, session_id: str, history_length: int) -> int:
+        """
+        获取上下文窗口（锚点）在当前对话历史中的起始位置
+        
+        锚点以消息的绝对序号保存，历史列表被截断后仍然有效
+        
+        Args:
+            session_id: 会话 ID
+            history_length: 当前对话历史的消息数
+            
+        Returns:
+            锚点在对话历史中的位置
+        """
+        session_data = self.redis.get_session(session_id)
+        if not session_data:
+            return 0
+        
+        # 当前历史中第一条消息的绝对序号
+        first_index = session_data.get("message_count", 0) - history_length
+        start = session_data.get("context_start", 0) - first_index
+        return min(max(start, 0), history_length)
+    
+    def set_context_start(self, session_id: str, history_length: int, start: int) -> bool:
+        """
+        保存上下文窗口（锚点）的起始位置
+        
+        Args:
+            session_id: 会话 ID
+            history_length: 当前对话历史的消息数
+            start: 锚点在对话历史中的位置
+            
+        Returns:
+            是否保存成功
+        """
+        session_data = self.redis.get_session(session_id)
+        if not session_data:
+            return False
+        
+        first_index = session_data.get("message_count", 0) - history_length
+        session_data["context_start"] = first_index + start
+        
+        return self.redis.save_session(session_id, session_data)
+    
     def delete_session(self, session_id: str) -> bool:
         """
         删除会话
@@ -112,6 +166,8 @@ class SessionManager:
         Returns:
             是否删除成功
         """
+        with self._history_lock:
+            self._history_cache.pop(session_id, None)
         return self.redis.delete_session(session_id)
     
     def get_user_sessions(self, user_id: str) -> List[Dict]:
@@ -138,6 +194,10 @@ class SessionManager:
         """
         获取对话历史
         
+        本进程保留最近使用会话的历史副本，并用 Redis 中的历史序号校验。序号与
+        消息在同一个事务中写入，任何进程写入或清空历史都会改变它，
+        每次只需从 Redis 读取新增的消息，而不是重新读取完整历史。
+        
         Args:
             session_id: 会话 ID
             limit: 限制返回的消息数量（可选）
@@ -145,7 +205,52 @@ class SessionManager:
         Returns:
             消息列表
         """
-        return self.redis.get_conversation_history(session_id, limit)
+        try:
+            seq = self.redis.get_history_seq(session_id)
+        except Exception as e:
+            print(f"⚠️  读取历史序号失败，直接读取历史: {e}")
+            seq = None
+        
+        if seq is None:
+            # 会话不存在（或已删除）时不使用缓存
+            with self._history_lock:
+                self._history_cache.pop(session_id, None)
+            return self.redis.get_conversation_history(session_id, limit)
+        
+        max_length = config.max_history_length
+        
+        with self._history_lock:
+            cached = self._history_cache.get(session_id)
+        
+        try:
+            if cached is not None and 0 <= seq - cached[0] < max_length:
+                history = cached[1]
+                new_count = seq - cached[0]
+                if new_count:
+                    # 只读取新增的消息；序号与消息在同一事务中读取，
+                    # 期间又有写入（序号不一致）时退回完整读取
+                    snapshot_seq, new_messages = self.redis.get_history_snapshot(session_id, new_count)
+                    if snapshot_seq == seq:
+                        history = (history + new_messages)[-max_length:]
+                    else:
+                        snapshot_seq, history = self.redis.get_history_snapshot(session_id)
+                    seq = snapshot_seq
+            elif limit:
+                # 未缓存时只取需要的部分
+                return self.redis.get_conversation_history(session_id, limit)
+            else:
+                seq, history = self.redis.get_history_snapshot(session_id)
+        except Exception as e:
+            print(f"❌ 获取对话历史失败: {e}")
+            return []
+        
+        with self._history_lock:
+            self._history_cache[session_id] = (seq, history)
+            self._history_cache.move_to_end(session_id)
+            if len(self._history_cache) > _HISTORY_CACHE_SIZE:
+                self._history_cache.popitem(last=False)
+        
+        return history[-limit:] if limit else list(history)
     
     def add_message(
         self,
@@ -175,6 +280,26 @@ class SessionManager:
         
         return success
     
+    def add_messages_bulk(self, session_id: str, messages: List[Dict]) -> bool:
+        """
+        批量添加消息到对话历史
+        
+        Args:
+            session_id: 会话 ID
+            messages: 消息列表，每条包含 role、content 和可选的 metadata
+            
+        Returns:
+            是否添加成功
+        """
+        # 一次写入所有消息
+        success = self.redis.add_messages_bulk(session_id, messages)
+        
+        if success and messages:
+            # 消息计数只更新一次
+            self.increment_message_count(session_id, len(messages))
+        
+        return success
+    
     def clear_history(self, session_id: str) -> bool:
         """
         清空对话历史
@@ -185,4 +310,8 @@ class SessionManager:
         Returns:
             是否清空成功
         """
+        with self._history_lock:
+            self._history_cache.pop(session_id, None)
+        
+        # 清空时 Redis 端推进历史序号，其他进程缓存的历史副本随之失效
         return self.redis.clear_history(session_id)
@@ -0,0 +1,145 @@
+"""
+Shared pytest fixtures for Nexus Agent tests.
+"""
+
+import uuid
+from functools import partial
+from pathlib import Path
+from typing import List
+
+import httpx
+import pytest
+from langchain_core.embeddings import DeterministicFakeEmbedding, Embeddings
+
+from nexus_agent.config.settings import config
+from nexus_agent.rag.embeddings import NexusEmbeddings
+
+
+# Embedding backends selectable through the `embeddings` fixture
+FAKE_EMBEDDINGS = "fake"
+BGE_ZH_EMBEDDINGS = "bge-zh"
+
+BGE_ZH_MODEL = "BAAI/bge-small-zh-v1.5"
+
+
+def _has_cassettes(item) -> bool:
+    """Whether pytest-recording cassettes exist for the item's test module."""
+    module_path = Path(str(item.fspath))
+    cassette_dir = module_path.parent / "cassettes" / module_path.stem
+    return cassette_dir.is_dir() and any(cassette_dir.iterdir())
+
+
+def pytest_runtest_setup(item):
+    """Skip DeepSeek tests that can neither call the API nor replay a cassette."""
+    if item.get_closest_marker("requires_deepseek") is None:
+        return
+    if not config.deepseek_api_key and not _has_cassettes(item):
+        pytest.skip("DeepSeek API key not set and no recorded cassettes")
+
+
+class FakeNexusEmbeddings(NexusEmbeddings):
+    """
+    Drop-in replacement for NexusEmbeddings that loads no model weights.
+
+    Vectors are derived deterministically from the text hash, which is
+    enough for structural tests (add/search/stats) that do not assert
+    on Chinese semantic recall.
+    """
+
+    def __init__(
+        self,
+        model_name: str = "fake",
+        device: str = "cpu",
+        normalize_embeddings: bool = True,
+        size: int = 512,
+        **kwargs,
+    ):
+        """
+        Initialize the fake embeddings.
+
+        Args:
+            model_name: Reported model name
+            device: Reported device
+            normalize_embeddings: Reported normalization flag
+            size: Dimension of the generated vectors (matches bge-small-zh)
+        """
+        self.model_name = model_name
+        self.device = device
+        self.normalize_embeddings = normalize_embeddings
+        self.encode_kwargs = {'normalize_embeddings': normalize_embeddings}
+        self.size = size
+        self.model = DeterministicFakeEmbedding(size=size)
+
+    def get_embeddings_model(self) -> Embeddings:
+        """Return the LangChain fake embeddings used by the vector store."""
+        return self.model
+
+    def embed_query(self, text: str) -> List[float]:
+        """Embed a single query text."""
+        return [float(x) for x in self.model.embed_query(text)]
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        """Embed multiple document texts."""
+        return [[float(x) for x in emb] for emb in self.model.embed_documents(texts)]
+
+    def get_embedding_dimension(self) -> int:
+        """Get the dimension of the embedding vectors."""
+        return self.size
+
+
+@pytest.fixture(scope="session")
+def fake_embeddings():
+    """Deterministic hash-based embeddings for tests that only need stable vectors."""
+    return FakeNexusEmbeddings()
+
+
+@pytest.fixture(scope="session")
+def bge_embeddings():
+    """Real BGE Chinese embeddings, loaded once per test session."""
+    return NexusEmbeddings(model_name=BGE_ZH_MODEL, device="cpu")
+
+
+@pytest.fixture(scope="session", params=[FAKE_EMBEDDINGS, BGE_ZH_EMBEDDINGS])
+def embeddings(request):
+    """
+    Embeddings backend for RAG tests.
+
+    Tests select a backend with
+    ``@pytest.mark.parametrize("embeddings", [...], indirect=True)``;
+    only tests asserting Chinese semantic recall need the real BGE model.
+    """
+    if request.param == FAKE_EMBEDDINGS:
+        return request.getfixturevalue("fake_embeddings")
+    return request.getfixturevalue("bge_embeddings")
+
+
+@pytest.fixture
+def collection_name():
+    """Unique Chroma collection name so in-memory stores do not share state."""
+    return f"test_{uuid.uuid4().hex}"
+
+
+@pytest.fixture(scope="session")
+def llm_http_client():
+    """
+    Pooled HTTP/2 client shared by every ChatOpenAI model built during the session.
+
+    The agent and its model-selection middleware construct their own
+    ChatOpenAI instances; patching the class in both modules makes them
+    reuse one keep-alive connection to the LLM endpoint instead of paying
+    a TLS handshake per query.
+    """
+    client = httpx.Client(
+        http2=True,
+        limits=httpx.Limits(max_keepalive_connections=10, keepalive_expiry=30),
+    )
+
+    from langchain_openai import ChatOpenAI
+
+    with pytest.MonkeyPatch.context() as mp:
+        pooled_chat_openai = partial(ChatOpenAI, http_client=client)
+        mp.setattr("nexus_agent.agent.agent.ChatOpenAI", pooled_chat_openai)
+        mp.setattr("nexus_agent.agent.middleware.ChatOpenAI", pooled_chat_openai)
+        yield client
+
+    client.close()
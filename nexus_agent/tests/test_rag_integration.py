@@ -5,6 +5,12 @@ Tests end-to-end RAG flow including indexing, retrieval,
 and agent responses.
 """
 
+import hashlib
+import json
+import multiprocessing
+import shutil
+import uuid
+
 import pytest
 from langchain_openai import ChatOpenAI
 from nexus_agent.rag.indexing import NexusIndexingPipeline
@@ -16,14 +22,33 @@ import os
 HAS_OPENAI_KEY = bool(os.getenv("OPENAI_API_KEY"))
 
 
+def _reload_collection_count(data_dir, persist_dir, queue):
+    """Reopen a persisted index in a fresh process and report its size."""
+    from nexus_agent.tests.conftest import FakeNexusEmbeddings
+    
+    # Counting stored records does not embed anything, so skip loading BGE
+    pipeline = NexusIndexingPipeline(
+        data_dir=data_dir,
+        persist_directory=persist_dir,
+        embeddings=FakeNexusEmbeddings()
+    )
+    queue.put(pipeline.get_pipeline_status()['collection_count'])
+
+
+# (query, any-of expected keywords) for the batched retrieval test
+RETRIEVAL_CASES = [
+    ("远程办公政策是什么？", ["远程", "办公", "弹性"]),
+    ("如何配置VPN", ["VPN", "vpn"]),
+    ("忘记密码怎么办", ["密码", "重置"]),
+]
+
+
 class TestRAGIntegration:
     """Integration tests for complete RAG system."""
     
-    @pytest.fixture
-    def indexing_pipeline(self, tmp_path):
-        """Setup indexing pipeline for testing."""
-        # Create test documents
-        (tmp_path / "employee_handbook.md").write_text("""
+    # Source documents for the shared index; editing them invalidates the cache
+    DOCUMENTS = {
+        "employee_handbook.md": """
 # 员工手册
 
 ## 远程办公政策
@@ -34,9 +59,8 @@ class TestRAGIntegration:
 - 年假：入职第一年5天，第二至五年10天，五年以上15天
 - 病假：每年15天带薪病假
 - 事假：每年5天带薪事假
-""")
-        
-        (tmp_path / "it_support.md").write_text("""
+""",
+        "it_support.md": """
 # IT支持文档
 
 ## VPN配置
@@ -50,17 +74,76 @@ class TestRAGIntegration:
 2. 点击"忘记密码"
 3. 输入公司邮箱
 4. 按邮件提示重置密码
-""")
+""",
+    }
+    CHUNK_SIZE = 500
+    CHUNK_OVERLAP = 100
+    
+    @pytest.fixture(scope="class")
+    def indexing_pipeline(self, request, tmp_path_factory, bge_embeddings):
+        """
+        Setup indexing pipeline for testing.
+        
+        Built once per class: tests using it must only read from the index
+        (update/reindex tests build their own pipelines).
+        
+        The persisted Chroma index is kept in the pytest cache together with a
+        fingerprint of its inputs: a content hash of every document, the
+        embedding model and the chunking settings. Reruns reopen it only when
+        the stored fingerprint matches and the collection is intact; otherwise
+        the stale index is dropped and rebuilt (``pytest --cache-clear`` also
+        forces a rebuild). Under pytest-xdist every worker keeps its own copy.
+        """
+        tmp_path = tmp_path_factory.mktemp("rag_docs")
+        for name, content in self.DOCUMENTS.items():
+            (tmp_path / name).write_text(content)
+        
+        document_hashes = {
+            name: hashlib.sha256(content.encode("utf-8")).hexdigest()
+            for name, content in self.DOCUMENTS.items()
+        }
+        fingerprint = hashlib.sha256(json.dumps(
+            {
+                "documents": document_hashes,
+                "embedding_model": bge_embeddings.model_name,
+                "chunk_size": self.CHUNK_SIZE,
+                "chunk_overlap": self.CHUNK_OVERLAP,
+            },
+            sort_keys=True
+        ).encode("utf-8")).hexdigest()
+        
+        # Each xdist worker keeps its own index so parallel runs never rebuild
+        # the same sqlite store concurrently
+        worker_id = os.environ.get("PYTEST_XDIST_WORKER", "main")
+        cache_key = f"rag_fixture/index_{worker_id}"
+        stored = request.config.cache.get(cache_key, None) or {}
+        persist_dir = request.config.cache.mkdir(f"rag_fixture_{worker_id}_{fingerprint[:16]}")
+        
+        # Inputs changed: remove the old index instead of leaving it behind
+        stale_dir = stored.get("persist_dir")
+        if stored.get("fingerprint") != fingerprint and stale_dir and stale_dir != str(persist_dir):
+            shutil.rmtree(stale_dir, ignore_errors=True)
         
         pipeline = NexusIndexingPipeline(
             data_dir=str(tmp_path),
-            persist_directory=None,  # In-memory for testing
-            embedding_model="BAAI/bge-small-zh-v1.5",
-            chunk_size=500,
-            chunk_overlap=100
+            persist_directory=str(persist_dir),
+            collection_name="rag_fixture",
+            embeddings=bge_embeddings,
+            chunk_size=self.CHUNK_SIZE,
+            chunk_overlap=self.CHUNK_OVERLAP
         )
         
-        pipeline.index_documents(verbose=False)
+        collection_count = pipeline.get_pipeline_status()['collection_count']
+        if (
+            stored.get("fingerprint") != fingerprint
+            or stored.get("collection_count") != collection_count
+        ):
+            pipeline.reindex_all(verbose=False)
+            request.config.cache.set(cache_key, {
+                "fingerprint": fingerprint,
+                "persist_dir": str(persist_dir),
+                "collection_count": pipeline.get_pipeline_status()['collection_count'],
+            })
         return pipeline
     
     @pytest.fixture
@@ -90,40 +173,26 @@ class TestRAGIntegration:
         assert stats['collection_count'] > 0
         assert stats['embedding_model'] == "BAAI/bge-small-zh-v1.5"
     
-    def test_retrieval_finds_relevant_documents(self, indexing_pipeline):
-        """Test that retrieval finds relevant Chinese documents."""
-        results = indexing_pipeline.test_retrieval(
-            "远程办公政策是什么？",
-            k=2,
-            verbose=False
-        )
-        
-        assert len(results) > 0
-        # Check that results contain relevant content
-        content = " ".join([doc.page_content for doc in results])
-        assert any(keyword in content for keyword in ["远程", "办公", "弹性"])
-    
-    def test_retrieval_with_vpn_query(self, indexing_pipeline):
-        """Test retrieval with VPN-related query."""
-        results = indexing_pipeline.vector_store.similarity_search(
-            "如何配置VPN",
-            k=2
-        )
-        
-        assert len(results) == 2
-        content = " ".join([doc.page_content for doc in results])
-        assert "VPN" in content or "vpn" in content
+    @pytest.fixture(scope="class")
+    def retrieval_results(self, indexing_pipeline):
+        """Top-2 results for every RETRIEVAL_CASES query, fetched in one batch."""
+        queries = [query for query, _ in RETRIEVAL_CASES]
+        results = indexing_pipeline.vector_store.similarity_search_batch(queries, k=2)
+        return dict(zip(queries, results))
     
-    def test_retrieval_with_password_query(self, indexing_pipeline):
-        """Test retrieval with password-related query."""
-        results = indexing_pipeline.vector_store.similarity_search(
-            "忘记密码怎么办",
-            k=2
-        )
+    @pytest.mark.parametrize(
+        "query,keywords",
+        RETRIEVAL_CASES,
+        ids=["remote_work", "vpn", "password"]
+    )
+    def test_retrieval_finds_relevant_documents(self, retrieval_results, query, keywords):
+        """Test that retrieval finds relevant Chinese documents."""
+        results = retrieval_results[query]
         
         assert len(results) == 2
+        # Check that results contain relevant content
         content = " ".join([doc.page_content for doc in results])
-        assert any(keyword in content for keyword in ["密码", "重置"])
+        assert any(keyword in content for keyword in keywords)
     
     def test_retriever_creation(self, indexing_pipeline):
         """Test creating retriever from vector store."""
@@ -251,7 +320,7 @@ class TestRAGIntegration:
         history_summary = agent.get_history_summary()
         assert history_summary['total_messages'] == 0
     
-    def test_vector_store_persistence(self, tmp_path):
+    def test_vector_store_persistence(self, tmp_path, bge_embeddings):
         """Test that vector store can persist and reload."""
         # Create initial pipeline
         (tmp_path / "test.md").write_text("# Test\nContent")
@@ -261,24 +330,35 @@ class TestRAGIntegration:
         pipeline1 = NexusIndexingPipeline(
             data_dir=str(tmp_path),
             persist_directory=persist_dir,
-            embedding_model="BAAI/bge-small-zh-v1.5"
+            embeddings=bge_embeddings
         )
         
         stats1 = pipeline1.index_documents(verbose=False)
         count1 = stats1['indexed_documents']
         
-        # Create new pipeline with same persist directory
-        pipeline2 = NexusIndexingPipeline(
-            data_dir=str(tmp_path),
-            persist_directory=persist_dir,
-            embedding_model="BAAI/bge-small-zh-v1.5"
+        # Reload in a spawned process: embedded Chroma is not fork-safe, and a
+        # fresh interpreter proves the data really came from disk
+        ctx = multiprocessing.get_context("spawn")
+        queue = ctx.Queue()
+        process = ctx.Process(
+            target=_reload_collection_count,
+            args=(str(tmp_path), persist_dir, queue)
         )
+        process.start()
+        # Wait for the child first: a crash then fails fast with its exit code
+        # (the traceback is on the captured stderr) instead of a queue timeout
+        process.join(timeout=120)
+        if process.is_alive():
+            process.terminate()
+            process.join()
+            pytest.fail("Reload process did not finish within 120s")
+        assert process.exitcode == 0, f"Reload process failed with exit code {process.exitcode}"
+        count2 = queue.get_nowait()
         
         # Check that documents are still there
-        stats2 = pipeline2.get_pipeline_status()
-        assert stats2['collection_count'] >= count1
+        assert count2 >= count1
     
-    def test_update_documents(self, tmp_path):
+    def test_update_documents(self, tmp_path, bge_embeddings, collection_name):
         """Test updating specific documents."""
         # Create initial document
         (tmp_path / "test.md").write_text("# Original\nOriginal content")
@@ -286,7 +366,8 @@ class TestRAGIntegration:
         pipeline = NexusIndexingPipeline(
             data_dir=str(tmp_path),
             persist_directory=None,
-            embedding_model="BAAI/bge-small-zh-v1.5"
+            collection_name=collection_name,
+            embeddings=bge_embeddings
         )
         
         # Index initial document
@@ -306,7 +387,7 @@ class TestRAGIntegration:
         assert stats2['loaded_documents'] == 1
         assert stats2['indexed_documents'] >= count1
     
-    def test_reindex_all(self, tmp_path):
+    def test_reindex_all(self, tmp_path, bge_embeddings, collection_name):
         """Test re-indexing all documents."""
         # Create documents
         (tmp_path / "test1.md").write_text("# Doc 1\nContent 1")
@@ -315,7 +396,8 @@ class TestRAGIntegration:
         pipeline = NexusIndexingPipeline(
             data_dir=str(tmp_path),
             persist_directory=None,
-            embedding_model="BAAI/bge-small-zh-v1.5"
+            collection_name=collection_name,
+            embeddings=bge_embeddings
         )
         
         # Initial index
@@ -358,14 +440,15 @@ class TestRAGIntegration:
 class TestRAGEdgeCases:
     """Tests for edge cases and error handling."""
     
-    def test_empty_query(self, tmp_path):
+    def test_empty_query(self, tmp_path, fake_embeddings, collection_name):
         """Test handling of empty query."""
         (tmp_path / "test.md").write_text("# Test\nContent")
         
         pipeline = NexusIndexingPipeline(
             data_dir=str(tmp_path),
             persist_directory=None,
-            embedding_model="BAAI/bge-small-zh-v1.5"
+            collection_name=collection_name,
+            embeddings=fake_embeddings
         )
         
         pipeline.index_documents(verbose=False)
@@ -375,14 +458,15 @@ class TestRAGEdgeCases:
         # Chroma may return some results even for empty query
         assert isinstance(results, list)
     
-    def test_no_matching_documents(self, tmp_path):
+    def test_no_matching_documents(self, tmp_path, fake_embeddings, collection_name):
         """Test query with no matching documents."""
         (tmp_path / "test.md").write_text("# Test\nContent about work")
         
         pipeline = NexusIndexingPipeline(
             data_dir=str(tmp_path),
             persist_directory=None,
-            embedding_model="BAAI/bge-small-zh-v1.5"
+            collection_name=collection_name,
+            embeddings=fake_embeddings
         )
         
         pipeline.index_documents(verbose=False)
@@ -396,14 +480,15 @@ class TestRAGEdgeCases:
         # Should still return results (based on similarity)
         assert isinstance(results, list)
     
-    def test_large_k_value(self, tmp_path):
+    def test_large_k_value(self, tmp_path, fake_embeddings, collection_name):
         """Test retrieval with large k value."""
         (tmp_path / "test.md").write_text("# Test\nContent")
         
         pipeline = NexusIndexingPipeline(
             data_dir=str(tmp_path),
             persist_directory=None,
-            embedding_model="BAAI/bge-small-zh-v1.5"
+            collection_name=collection_name,
+            embeddings=fake_embeddings
         )
         
         pipeline.index_documents(verbose=False)
@@ -414,14 +499,15 @@ class TestRAGEdgeCases:
         # Should return all available documents
         assert len(results) <= 100
     
-    def test_special_characters_in_query(self, tmp_path):
+    def test_special_characters_in_query(self, tmp_path, fake_embeddings, collection_name):
         """Test query with special characters."""
         (tmp_path / "test.md").write_text("# Test\nContent with special chars: @#$%^&*()")
         
         pipeline = NexusIndexingPipeline(
             data_dir=str(tmp_path),
             persist_directory=None,
-            embedding_model="BAAI/bge-small-zh-v1.5"
+            collection_name=collection_name,
+            embeddings=fake_embeddings
         )
         
         pipeline.index_documents(verbose=False)
@@ -431,14 +517,15 @@ class TestRAGEdgeCases:
         
         assert isinstance(results, list)
     
-    def test_very_long_query(self, tmp_path):
+    def test_very_long_query(self, tmp_path, fake_embeddings, collection_name):
         """Test very long query."""
         (tmp_path / "test.md").write_text("# Test\nContent")
         
         pipeline = NexusIndexingPipeline(
             data_dir=str(tmp_path),
             persist_directory=None,
-            embedding_model="BAAI/bge-small-zh-v1.5"
+            collection_name=collection_name,
+            embeddings=fake_embeddings
         )
         
         pipeline.index_documents(verbose=False)
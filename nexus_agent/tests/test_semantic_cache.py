@@ -0,0 +1,41 @@
+"""
+单元测试 - 查询缓存
+"""
+
+from nexus_agent.agent.agent import AgentResponse
+from nexus_agent.agent.semantic_cache import SemanticQueryCache
+
+
+class FixedEmbeddings:
+    """每个查询都返回同一个向量，用于检查语义层的向量行"""
+
+    def embed_query(self, text):
+        return [1.0, 0.0, 0.0]
+
+
+class TestSemanticQueryCache:
+    """测试查询缓存"""
+
+    def test_hits_do_not_share_mutable_fields(self):
+        """测试命中返回的是副本，调用方修改不会影响缓存"""
+        cache = SemanticQueryCache()
+        response = AgentResponse(content="答案", success=True, tool_calls=[{"name": "lookup"}])
+        cache.set("问题", response)
+
+        # 修改原始对象和第一次命中的结果
+        response.tool_calls.append({"name": "mutated"})
+        first = cache.get("问题")
+        first.tool_calls.append({"name": "mutated"})
+
+        second = cache.get("问题")
+        assert second.tool_calls == [{"name": "lookup"}]
+        assert second is not first
+
+    def test_reset_replaces_vector_row(self):
+        """测试重复写入同一查询时替换而不是追加向量行"""
+        cache = SemanticQueryCache(embeddings=FixedEmbeddings())
+        cache.set("问题", AgentResponse(content="旧答案", success=True))
+        cache.set("问题", AgentResponse(content="新答案", success=True))
+
+        assert sum(len(entries) for entries in cache.vectors.values()) == 1
+        assert cache.get("问题").content == "新答案"
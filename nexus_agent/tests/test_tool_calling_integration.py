@@ -7,19 +7,35 @@ import pytest
 from nexus_agent.agent.agent import NexusLangChainAgent
 from nexus_agent.config.settings import config
 
+# LLM 请求通过 pytest-recording (vcrpy) 录制/回放，避免每次测试都访问 DeepSeek
+# record_mode 为 once：没有录制文件时访问 DeepSeek 并录制，之后只回放
+# 未配置 DEEPSEEK_API_KEY 且没有录制文件时自动跳过，避免 CI 中无意义的网络超时
+pytestmark = [pytest.mark.vcr, pytest.mark.requires_deepseek]
+
+
+@pytest.fixture(scope="module")
+def vcr_config():
+    """VCR 配置：过滤 API Key，并按请求体区分不同的提示词"""
+    return {
+        "filter_headers": ["authorization"],
+        "match_on": ["method", "scheme", "host", "port", "path", "query", "body"],
+        "record_mode": "once",
+    }
+
+
+@pytest.fixture(scope="session")
+def agent(llm_http_client):
+    """创建测试用的 agent（整个测试会话共享，工具调用 agent 本身不保存对话状态；LLM 请求复用同一 HTTP/2 连接池）"""
+    return NexusLangChainAgent(
+        provider="deepseek",
+        model="deepseek-chat",
+        temperature=0.7
+    )
+
 
 class TestToolCallingIntegration:
     """测试工具调用集成"""
     
-    @pytest.fixture
-    def agent(self):
-        """创建测试用的 agent"""
-        return NexusLangChainAgent(
-            provider="deepseek",
-            model="deepseek-chat",
-            temperature=0.7
-        )
-    
     def test_employee_search_tool_calling(self, agent):
         """测试员工搜索工具调用"""
         response = agent.process_message("张三的电话是多少？")
@@ -83,79 +99,55 @@ class TestToolCallingIntegration:
 class TestToolSelectionAccuracy:
     """测试工具选择准确性"""
     
-    @pytest.fixture
-    def agent(self):
-        return NexusLangChainAgent(
-            provider="deepseek",
-            model="deepseek-chat",
-            temperature=0.7
-        )
-    
-    def test_selects_search_employee_tool(self, agent):
+    @pytest.mark.parametrize("query", [
+        "张三的电话",
+        "技术部有哪些人",
+        "找一下李四",
+    ])
+    def test_selects_search_employee_tool(self, agent, query):
         """测试选择员工搜索工具"""
-        test_cases = [
-            "张三的电话",
-            "技术部有哪些人",
-            "找一下李四",
-        ]
-        
-        for query in test_cases:
-            response = agent.process_message(query)
-            # 应该调用了 search_employee_directory 工具
-            assert response.success is True
-            assert "张三" in response.content or "李四" in response.content or "技术部" in response.content
+        response = agent.process_message(query)
+        # 应该调用了 search_employee_directory 工具
+        assert response.success is True
+        assert "张三" in response.content or "李四" in response.content or "技术部" in response.content
     
-    def test_selects_book_meeting_room_tool(self, agent):
+    @pytest.mark.parametrize("query", [
+        "帮我订个会议室",
+        "预订 A1 会议室",
+        "明天下午2点开个会",
+    ])
+    def test_selects_book_meeting_room_tool(self, agent, query):
         """测试选择预订会议室工具"""
-        test_cases = [
-            "帮我订个会议室",
-            "预订 A1 会议室",
-            "明天下午2点开个会",
-        ]
-        
-        for query in test_cases:
-            response = agent.process_message(query)
-            assert response.success is True
-            # 应该询问参数或尝试预订
+        response = agent.process_message(query)
+        assert response.success is True
+        # 应该询问参数或尝试预订
     
-    def test_selects_query_leave_balance_tool(self, agent):
+    @pytest.mark.parametrize("query", [
+        "我还有多少天年假",
+        "查一下张三的假期",
+        "我的假期余额",
+    ])
+    def test_selects_query_leave_balance_tool(self, agent, query):
         """测试选择假期查询工具"""
-        test_cases = [
-            "我还有多少天年假",
-            "查一下张三的假期",
-            "我的假期余额",
-        ]
-        
-        for query in test_cases:
-            response = agent.process_message(query)
-            assert response.success is True
-            assert "年假" in response.content or "病假" in response.content or "未找到" in response.content
+        response = agent.process_message(query)
+        assert response.success is True
+        assert "年假" in response.content or "病假" in response.content or "未找到" in response.content
     
-    def test_selects_get_available_rooms_tool(self, agent):
+    @pytest.mark.parametrize("query", [
+        "明天下午有哪些会议室可用",
+        "查一下明天上午的会议室",
+        "2026-01-10 下午2点有会议室吗",
+    ])
+    def test_selects_get_available_rooms_tool(self, agent, query):
         """测试选择查询可用会议室工具"""
-        test_cases = [
-            "明天下午有哪些会议室可用",
-            "查一下明天上午的会议室",
-            "2026-01-10 下午2点有会议室吗",
-        ]
-        
-        for query in test_cases:
-            response = agent.process_message(query)
-            assert response.success is True
-            # 应该返回会议室信息或询问时间
+        response = agent.process_message(query)
+        assert response.success is True
+        # 应该返回会议室信息或询问时间
 
 
 class TestToolErrorHandling:
     """测试工具错误处理"""
     
-    @pytest.fixture
-    def agent(self):
-        return NexusLangChainAgent(
-            provider="deepseek",
-            model="deepseek-chat",
-            temperature=0.7
-        )
-    
     def test_invalid_employee_search(self, agent):
         """测试搜索不存在的员工"""
         response = agent.process_message("查找不存在的人的信息")
@@ -185,15 +177,7 @@ class TestToolErrorHandling:
 class TestToolPerformance:
     """测试工具性能"""
     
-    @pytest.fixture
-    def agent(self):
-        return NexusLangChainAgent(
-            provider="deepseek",
-            model="deepseek-chat",
-            temperature=0.7
-        )
-    
-    def test_tool_response_time(self, agent):
+    def test_tool_response_time(self, agent, record_mode):
         """测试工具响应时间"""
         import time
         
@@ -202,10 +186,11 @@ class TestToolPerformance:
         end_time = time.time()
         
         assert response.success is True
-        # 响应时间应该在合理范围内（< 30秒）
-        assert (end_time - start_time) < 30.0
+        # 响应时间应该在合理范围内（< 30秒），回放录制结果时不计时
+        if record_mode == "all":
+            assert (end_time - start_time) < 30.0
     
-    def test_multiple_tool_calls_performance(self, agent):
+    def test_multiple_tool_calls_performance(self, agent, record_mode):
         """测试多次工具调用的性能"""
         queries = [
             "张三的电话是多少？",
@@ -216,27 +201,23 @@ class TestToolPerformance:
         import time
         start_time = time.time()
         
-        for query in queries:
-            response = agent.process_message(query)
-            assert response.success is True
+        # 三个查询互不依赖，并发发送
+        responses = agent.process_messages_batch(queries)
         
         end_time = time.time()
         
-        # 总响应时间应该在合理范围内（< 90秒）
-        assert (end_time - start_time) < 90.0
+        assert len(responses) == len(queries)
+        for response in responses:
+            assert response.success is True
+        
+        # 并发后总时间取决于最慢的一次调用（< 30秒），回放录制结果时不计时
+        if record_mode == "all":
+            assert (end_time - start_time) < 30.0
 
 
 class TestToolContextIntegration:
     """测试工具与上下文的集成"""
     
-    @pytest.fixture
-    def agent(self):
-        return NexusLangChainAgent(
-            provider="deepseek",
-            model="deepseek-chat",
-            temperature=0.7
-        )
-    
     def test_tool_result_in_conversation(self, agent):
         """测试工具结果在对话中的使用"""
         # 第一轮：查询员工信息
@@ -271,14 +252,6 @@ class TestToolContextIntegration:
 class TestToolMetadata:
     """测试工具元数据"""
     
-    @pytest.fixture
-    def agent(self):
-        return NexusLangChainAgent(
-            provider="deepseek",
-            model="deepseek-chat",
-            temperature=0.7
-        )
-    
     def test_response_metadata(self, agent):
         """测试响应元数据"""
         response = agent.process_message("张三的电话是多少？")
@@ -5,465 +5,556 @@ Provides document cleaning, table extraction, and text normalization
 functions to prepare documents for indexing.
 """
 
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+import functools
+import io
+import multiprocessing
+import os
 import re
+import string
+import threading
 from typing import List, Dict, Any, Optional
 import logging
 
 logger = logging.getLogger(__name__)
 
+# Patterns are compiled once at import time and shared by every call
+_RE_SPACES = re.compile(r'[ \t]+')
+_RE_NEWLINES = re.compile(r'\n{3,}')
+_RE_CONTROL = re.compile(r'[\x00-\x08\x0b\x0c\x0e-\x1f\x7f-\x9f]')
+_RE_BULLET = re.compile(r'•\s*')
+_RE_SPACE_BEFORE_PUNCT = re.compile(r' ([.,;:)])')
+_RE_SPACE_AFTER_PAREN = re.compile(r'(\() ')
+_RE_WHITESPACE = re.compile(r'\s+')
+_RE_HTTP_URL = re.compile(r'https?://\S+')
+_RE_WWW_URL = re.compile(r'www\.\S+')
+# Email: bounded local part and dot-separated domain labels that must start
+# and end with an alphanumeric, so no two quantified atoms can compete for
+# the same characters (linear matching even on adversarial input)
+_RE_EMAIL = re.compile(
+    r'\b[A-Za-z0-9._%+\-]{1,64}'
+    r'@[A-Za-z0-9](?:[A-Za-z0-9\-]{0,62}[A-Za-z0-9])?'
+    r'(?:\.[A-Za-z0-9](?:[A-Za-z0-9\-]{0,62}[A-Za-z0-9])?)*'
+    r'\.[A-Za-z]{2,24}\b'
+)
+_RE_TABLE = re.compile(r'\|([^\n]+)\|\n\|[-:| ]+\|\n((?:\|[^\n]+\|\n)+)')
+_RE_CODE_BLOCK = re.compile(r'```(\w*)\n(.*?)```', re.DOTALL)
+_RE_ANY_CODE_BLOCK = re.compile(r'```.*?```', re.DOTALL)
+# Whole markdown heading line; surrounding whitespace (not newlines) is
+# allowed, as if each line were stripped first. Anchored on a literal '\n'
+# rather than a multiline '^' so the scan uses the fast literal search;
+# match against '\n' + text so the first line is also preceded by one.
+_RE_HEADING_LINE = re.compile(r'\n([^\S\n]*(#{1,6})[^\S\n]+([^\n]*\S)[^\S\n]*)$', re.MULTILINE)
+_RE_SENTENCE_END = re.compile(r'[.!?]+')
+_RE_CAPITALIZED_PHRASE = re.compile(r'\b[A-Z][a-z]+(?:\s+[A-Z][a-z]+)+\b')
 
-class DataPreprocessor:
+# UTF-8 prefixes of CJK Unified Ideographs (U+4E00-U+9FFF): lead bytes
+# E5-E9 cover U+5000-U+9FFF, E4 followed by B8-BF covers U+4E00-U+4FFF.
+# Lead bytes never occur inside another character, so bytes.count is exact.
+_CJK_UTF8_PREFIXES = tuple(bytes([lead]) for lead in range(0xE5, 0xEA)) + tuple(
+    bytes([0xE4, second]) for second in range(0xB8, 0xC0)
+)
+_ASCII_LETTERS = string.ascii_letters.encode('ascii')
+
+
+def clean_text(text: str) -> str:
     """
-    Utility class for cleaning and preprocessing document content.
+    Clean text by removing excessive whitespace, special characters, etc.
     
-    Handles tables, formatting issues, and noise to improve
-    the quality of indexed documents.
+    Args:
+        text: Raw text to clean
+        
+    Returns:
+        Cleaned text
     """
+    if not text:
+        return ""
     
-    @staticmethod
-    def clean_text(text: str) -> str:
-        """
-        Clean text by removing excessive whitespace, special characters, etc.
-        
-        Args:
-            text: Raw text to clean
-            
-        Returns:
-            Cleaned text
-        """
-        if not text:
-            return ""
-        
-        # Remove excessive whitespace
-        text = re.sub(r'[ \t]+', ' ', text)  # Multiple spaces/tabs to single space
-        text = re.sub(r'\n{3,}', '\n\n', text)  # Multiple newlines to double
-        
-        # Remove control characters except newlines and tabs
-        text = re.sub(r'[\x00-\x08\x0b\x0c\x0e-\x1f\x7f-\x9f]', '', text)
-        
-        # Fix common formatting issues
-        text = text.replace(' .', '.')  # Fix spaced periods
-        text = text.replace(' ,', ',')  # Fix spaced commas
-        text = text.replace(' ;', ';')  # Fix spaced semicolons
-        text = text.replace(' :', ':')  # Fix spaced colons
-        text = text.replace('( ', '(')  # Fix spaced opening parentheses
-        text = text.replace(' )', ')')  # Fix spaced closing parentheses
-        
-        # Remove bullet point artifacts
-        text = re.sub(r'•\s*', '• ', text)  # Normalize bullets
-        
-        # Strip leading/trailing whitespace
-        text = text.strip()
-        
-        return text
+    # Remove excessive whitespace
+    text = _RE_SPACES.sub(' ', text)  # Multiple spaces/tabs to single space
+    text = _RE_NEWLINES.sub('\n\n', text)  # Multiple newlines to double
     
-    @staticmethod
-    def normalize_whitespace(text: str) -> str:
-        """
-        Normalize whitespace in text.
-        
-        Args:
-            text: Text to normalize
-            
-        Returns:
-            Text with normalized whitespace
-        """
-        if not text:
-            return ""
-        
-        # Replace all whitespace sequences with single space
-        text = re.sub(r'\s+', ' ', text)
-        
-        return text.strip()
+    # Remove control characters except newlines and tabs
+    text = _RE_CONTROL.sub('', text)
+    
+    # Fix common formatting issues
+    text = _RE_SPACE_BEFORE_PUNCT.sub(r'\1', text)  # Fix spaced . , ; : and )
+    text = _RE_SPACE_AFTER_PAREN.sub(r'\1', text)  # Fix spaced opening parentheses
     
-    @staticmethod
-    def remove_urls(text: str) -> str:
-        """
-        Remove URLs from text.
+    # Remove bullet point artifacts
+    text = _RE_BULLET.sub('• ', text)  # Normalize bullets
+    
+    # Strip leading/trailing whitespace
+    text = text.strip()
+    
+    return text
+
+
+def normalize_whitespace(text: str) -> str:
+    """
+    Normalize whitespace in text.
+    
+    Args:
+        text: Text to normalize
         
-        Args:
-            text: Text to process
-            
-        Returns:
-            Text without URLs
-        """
-        # Remove HTTP/HTTPS URLs
-        text = re.sub(r'https?://\S+', '', text)
+    Returns:
+        Text with normalized whitespace
+    """
+    if not text:
+        return ""
+    
+    # Replace all whitespace sequences with single space
+    text = _RE_WHITESPACE.sub(' ', text)
+    
+    return text.strip()
+
+
+def remove_urls(text: str) -> str:
+    """
+    Remove URLs from text.
+    
+    Args:
+        text: Text to process
         
-        # Remove www URLs
-        text = re.sub(r'www\.\S+', '', text)
+    Returns:
+        Text without URLs
+    """
+    # Remove HTTP/HTTPS URLs
+    text = _RE_HTTP_URL.sub('', text)
+    
+    # Remove www URLs
+    text = _RE_WWW_URL.sub('', text)
+    
+    return text
+
+
+def remove_email_addresses(text: str) -> str:
+    """
+    Remove email addresses from text.
+    
+    Args:
+        text: Text to process
         
+    Returns:
+        Text without email addresses
+    """
+    # Most documents contain no '@'; the substring test is far cheaper than the regex scan
+    if '@' not in text:
         return text
+    return _RE_EMAIL.sub('', text)
+
+
+def extract_tables(text: str) -> List[Dict[str, Any]]:
+    """
+    Extract tables from markdown text.
     
-    @staticmethod
-    def remove_email_addresses(text: str) -> str:
-        """
-        Remove email addresses from text.
-        
-        Args:
-            text: Text to process
-            
-        Returns:
-            Text without email addresses
-        """
-        return re.sub(r'\b[A-Za-z0-9._%+-]+@[A-Za-z0-9.-]+\.[A-Z|a-z]{2,}\b', '', text)
-    
-    @staticmethod
-    def extract_tables(text: str) -> List[Dict[str, Any]]:
-        """
-        Extract tables from markdown text.
-        
-        Args:
-            text: Markdown text containing tables
-            
-        Returns:
-            List of dictionaries representing tables
-        """
-        tables = []
-        
-        # Markdown table pattern
-        # | header1 | header2 | header3 |
-        # |----------|----------|----------|
-        # | cell1    | cell2    | cell3    |
-        table_pattern = r'\|(.+)\|\n\|[-:| ]+\|\n((?:\|.+\|\n)+)'
-        
-        for match in re.finditer(table_pattern, text):
-            # Parse header
-            header_line = match.group(1).strip()
-            header = [cell.strip() for cell in header_line.split('|')]
-            
-            # Parse rows
-            rows = []
-            row_lines = match.group(2).strip().split('\n')
-            
-            for row_line in row_lines:
-                cells = [cell.strip() for cell in row_line.split('|')]
-                # Filter out empty cells from leading/trailing pipes
-                cells = [cell for cell in cells if cell or cells.index(cell) not in [0, len(cells)-1]]
-                if cells:
-                    rows.append(cells)
-            
-            tables.append({
-                'header': header,
-                'rows': rows,
-                'raw_text': match.group(0)
-            })
+    Args:
+        text: Markdown text containing tables
         
-        logger.info(f"Extracted {len(tables)} table(s) from text")
-        return tables
+    Returns:
+        List of dictionaries representing tables
+    """
+    tables = []
     
-    @staticmethod
-    def format_table_as_text(table: Dict[str, Any]) -> str:
-        """
-        Format a table dictionary as readable text.
-        
-        Args:
-            table: Table dictionary with header and rows
-            
-        Returns:
-            Formatted text representation of the table
-        """
-        lines = []
-        
-        # Header
-        lines.append("表格:")
-        lines.append(" | ".join(table['header']))
-        lines.append("-" * len(" | ".join(table['header'])))
-        
-        # Rows
-        for row in table['rows']:
-            lines.append(" | ".join(row))
-        
-        return "\n".join(lines)
+    # Markdown table pattern
+    # | header1 | header2 | header3 |
+    # |----------|----------|----------|
+    # | cell1    | cell2    | cell3    |
+    for match in _RE_TABLE.finditer(text):
+        # Parse header
+        header_line = match.group(1).strip()
+        header = [cell.strip() for cell in header_line.split('|')]
+        
+        # Parse rows
+        rows = []
+        for row_line in io.StringIO(match.group(2).strip()):
+            cells = [cell.strip() for cell in row_line.split('|')]
+            # Filter out empty cells from leading/trailing pipes
+            last = len(cells) - 1
+            cells = [cell for i, cell in enumerate(cells) if cell or (i != 0 and i != last)]
+            if cells:
+                rows.append(cells)
+        
+        tables.append({
+            'header': header,
+            'rows': rows,
+            'raw_text': match.group(0)
+        })
     
-    @staticmethod
-    def format_table_as_markdown(table: Dict[str, Any]) -> str:
-        """
-        Format a table dictionary as markdown.
-        
-        Args:
-            table: Table dictionary with header and rows
-            
-        Returns:
-            Markdown table string
-        """
-        lines = []
-        
-        # Header
-        header = " | ".join(table['header'])
-        lines.append(f"| {header} |")
-        
-        # Separator
-        separator = " | ".join(["---"] * len(table['header']))
-        lines.append(f"| {separator} |")
-        
-        # Rows
-        for row in table['rows']:
-            row_text = " | ".join(row)
-            lines.append(f"| {row_text} |")
-        
-        return "\n".join(lines)
+    logger.info(f"Extracted {len(tables)} table(s) from text")
+    return tables
+
+
+def format_table_as_text(table: Dict[str, Any]) -> str:
+    """
+    Format a table dictionary as readable text.
     
-    @staticmethod
-    def extract_code_blocks(text: str) -> List[Dict[str, str]]:
-        """
-        Extract code blocks from markdown text.
-        
-        Args:
-            text: Markdown text containing code blocks
-            
-        Returns:
-            List of dictionaries representing code blocks
-        """
-        code_blocks = []
-        
-        # Code block pattern: ```language\ncode\n```
-        code_pattern = r'```(\w*)\n(.*?)```'
-        
-        for match in re.finditer(code_pattern, text, re.DOTALL):
-            language = match.group(1) or 'text'
-            code = match.group(2)
-            
-            code_blocks.append({
-                'language': language,
-                'code': code,
-                'raw_text': match.group(0)
-            })
+    Args:
+        table: Table dictionary with header and rows
         
-        logger.info(f"Extracted {len(code_blocks)} code block(s) from text")
-        return code_blocks
+    Returns:
+        Formatted text representation of the table
+    """
+    lines = []
     
-    @staticmethod
-    def remove_code_blocks(text: str) -> str:
-        """
-        Remove code blocks from text.
-        
-        Args:
-            text: Text to process
-            
-        Returns:
-            Text without code blocks
-        """
-        return re.sub(r'```.*?```', '', text, flags=re.DOTALL)
-    
-    @staticmethod
-    def extract_headings(text: str) -> List[Dict[str, str]]:
-        """
-        Extract headings from markdown text.
-        
-        Args:
-            text: Markdown text containing headings
-            
-        Returns:
-            List of dictionaries representing headings
-        """
-        headings = []
-        
-        # Heading pattern: # Heading or ## Heading, etc.
-        heading_pattern = r'^(#{1,6})\s+(.+)$'
-        
-        for line in text.split('\n'):
-            match = re.match(heading_pattern, line.strip())
-            if match:
-                level = len(match.group(1))
-                content = match.group(2)
-                
-                headings.append({
-                    'level': level,
-                    'content': content,
-                    'raw_text': line
-                })
-        
-        logger.info(f"Extracted {len(headings)} heading(s) from text")
-        return headings
+    # Header
+    lines.append("表格:")
+    lines.append(" | ".join(table['header']))
+    lines.append("-" * len(" | ".join(table['header'])))
     
-    @staticmethod
-    def split_by_headings(text: str) -> List[Dict[str, str]]:
-        """
-        Split text into sections based on headings.
-        
-        Args:
-            text: Text to split
-            
-        Returns:
-            List of dictionaries representing sections
-        """
-        sections = []
-        current_section = {'heading': None, 'content': []}
-        
-        for line in text.split('\n'):
-            # Check if line is a heading
-            heading_match = re.match(r'^(#{1,6})\s+(.+)$', line.strip())
-            
-            if heading_match:
-                # Save previous section
-                if current_section['heading'] or current_section['content']:
-                    sections.append({
-                        'heading': current_section['heading'],
-                        'content': '\n'.join(current_section['content']).strip()
-                    })
-                
-                # Start new section
-                current_section = {
-                    'heading': heading_match.group(2),
-                    'content': []
-                }
-            else:
-                current_section['content'].append(line)
-        
-        # Add last section
-        if current_section['heading'] or current_section['content']:
-            sections.append({
-                'heading': current_section['heading'],
-                'content': '\n'.join(current_section['content']).strip()
-            })
-        
-        logger.info(f"Split text into {len(sections)} section(s)")
-        return sections
+    # Rows
+    for row in table['rows']:
+        lines.append(" | ".join(row))
     
-    @staticmethod
-    def detect_language(text: str) -> str:
-        """
-        Detect the primary language of the text.
-        
-        Simple heuristic based on character ranges.
-        
-        Args:
-            text: Text to analyze
-            
-        Returns:
-            Language code ('zh' for Chinese, 'en' for English, 'mixed' for both)
-        """
-        if not text:
-            return 'unknown'
-        
-        # Count Chinese characters
-        chinese_chars = len(re.findall(r'[\u4e00-\u9fff]', text))
-        
-        # Count English characters
-        english_chars = len(re.findall(r'[a-zA-Z]', text))
-        
-        total_chars = chinese_chars + english_chars
-        
-        if total_chars == 0:
-            return 'unknown'
-        
-        chinese_ratio = chinese_chars / total_chars
-        english_ratio = english_chars / total_chars
-        
-        if chinese_ratio > 0.7:
-            return 'zh'
-        elif english_ratio > 0.7:
-            return 'en'
-        else:
-            return 'mixed'
-    
-    @staticmethod
-    def preprocess_document(
-        text: str,
-        clean: bool = True,
-        remove_urls: bool = False,
-        remove_emails: bool = False,
-        normalize: bool = False,
-    ) -> str:
-        """
-        Apply multiple preprocessing steps to a document.
-        
-        Args:
-            text: Text to preprocess
-            clean: Whether to clean text
-            remove_urls: Whether to remove URLs
-            remove_emails: Whether to remove email addresses
-            normalize: Whether to normalize whitespace
-            
-        Returns:
-            Preprocessed text
-        """
-        result = text
-        
-        if clean:
-            result = DataPreprocessor.clean_text(result)
+    return "\n".join(lines)
+
+
+def format_table_as_markdown(table: Dict[str, Any]) -> str:
+    """
+    Format a table dictionary as markdown.
+    
+    Args:
+        table: Table dictionary with header and rows
         
-        if remove_urls:
-            result = DataPreprocessor.remove_urls(result)
+    Returns:
+        Markdown table string
+    """
+    lines = []
+    
+    # Header
+    header = " | ".join(table['header'])
+    lines.append(f"| {header} |")
+    
+    # Separator
+    separator = " | ".join(["---"] * len(table['header']))
+    lines.append(f"| {separator} |")
+    
+    # Rows
+    for row in table['rows']:
+        row_text = " | ".join(row)
+        lines.append(f"| {row_text} |")
+    
+    return "\n".join(lines)
+
+
+def extract_code_blocks(text: str) -> List[Dict[str, str]]:
+    """
+    Extract code blocks from markdown text.
+    
+    Args:
+        text: Markdown text containing code blocks
         
-        if remove_emails:
-            result = DataPreprocessor.remove_email_addresses(result)
+    Returns:
+        List of dictionaries representing code blocks
+    """
+    code_blocks = []
+    
+    # Code block pattern: ```language\ncode\n```
+    for match in _RE_CODE_BLOCK.finditer(text):
+        language = match.group(1) or 'text'
+        code = match.group(2)
+        
+        code_blocks.append({
+            'language': language,
+            'code': code,
+            'raw_text': match.group(0)
+        })
+    
+    logger.info(f"Extracted {len(code_blocks)} code block(s) from text")
+    return code_blocks
+
+
+def remove_code_blocks(text: str) -> str:
+    """
+    Remove code blocks from text.
+    
+    Args:
+        text: Text to process
         
-        if normalize:
-            result = DataPreprocessor.normalize_whitespace(result)
+    Returns:
+        Text without code blocks
+    """
+    return _RE_ANY_CODE_BLOCK.sub('', text)
+
+
+def extract_headings(text: str) -> List[Dict[str, str]]:
+    """
+    Extract headings from markdown text.
+    
+    Args:
+        text: Markdown text containing headings
         
-        return result
+    Returns:
+        List of dictionaries representing headings
+    """
+    # Heading pattern: # Heading or ## Heading, etc., found in one scan
+    headings = [
+        {
+            'level': len(match.group(2)),
+            'content': match.group(3),
+            'raw_text': match.group(1)
+        }
+        for match in _RE_HEADING_LINE.finditer('\n' + text)
+    ]
+    
+    logger.info(f"Extracted {len(headings)} heading(s) from text")
+    return headings
+
+
+def split_by_headings(text: str) -> List[Dict[str, str]]:
+    """
+    Split text into sections based on headings.
     
-    @staticmethod
-    def extract_key_phrases(text: str, min_length: int = 3) -> List[str]:
-        """
-        Extract key phrases from text.
+    Args:
+        text: Text to split
         
-        Simple heuristic based on capitalized words and common patterns.
+    Returns:
+        List of dictionaries representing sections
+    """
+    padded = '\n' + text
+    matches = list(_RE_HEADING_LINE.finditer(padded))
+    if not matches:
+        return [{'heading': None, 'content': text.strip()}]
+    
+    sections = []
+    
+    # Text before the first heading
+    if matches[0].start() > 0:
+        sections.append({
+            'heading': None,
+            'content': padded[:matches[0].start()].strip()
+        })
+    
+    # Each section runs from its heading line to the next heading
+    for match, next_match in zip(matches, matches[1:] + [None]):
+        end = next_match.start() if next_match else len(padded)
+        sections.append({
+            'heading': match.group(3),
+            'content': padded[match.end():end].strip()
+        })
+    
+    logger.info(f"Split text into {len(sections)} section(s)")
+    return sections
+
+
+def detect_language(text: str) -> str:
+    """
+    Detect the primary language of the text.
+    
+    Simple heuristic based on character ranges.
+    
+    Args:
+        text: Text to analyze
         
-        Args:
-            text: Text to analyze
-            min_length: Minimum phrase length in words
-            
-        Returns:
-            List of key phrases
-        """
-        # Split into sentences
-        sentences = re.split(r'[.!?]+', text)
+    Returns:
+        Language code ('zh' for Chinese, 'en' for English, 'mixed' for both)
+    """
+    if not text:
+        return 'unknown'
+    
+    # Count on the UTF-8 bytes with C-level bytes.count/translate
+    data = text.encode('utf-8', 'surrogatepass')
+    
+    # Count Chinese characters
+    chinese_chars = sum(map(data.count, _CJK_UTF8_PREFIXES))
+    
+    # Count English characters (ASCII bytes never appear inside multibyte characters)
+    english_chars = len(data) - len(data.translate(None, _ASCII_LETTERS))
+    
+    total_chars = chinese_chars + english_chars
+    
+    if total_chars == 0:
+        return 'unknown'
+    
+    chinese_ratio = chinese_chars / total_chars
+    english_ratio = english_chars / total_chars
+    
+    if chinese_ratio > 0.7:
+        return 'zh'
+    elif english_ratio > 0.7:
+        return 'en'
+    else:
+        return 'mixed'
+
+
+# preprocess_document's remove_urls flag shadows the function of that name
+_remove_urls = remove_urls
+
+
+def preprocess_document(
+    text: str,
+    clean: bool = True,
+    remove_urls: bool = False,
+    remove_emails: bool = False,
+    normalize: bool = False,
+) -> str:
+    """
+    Apply multiple preprocessing steps to a document.
+    
+    Args:
+        text: Text to preprocess
+        clean: Whether to clean text
+        remove_urls: Whether to remove URLs
+        remove_emails: Whether to remove email addresses
+        normalize: Whether to normalize whitespace
         
-        phrases = []
+    Returns:
+        Preprocessed text
+    """
+    result = text
+    
+    if clean:
+        result = clean_text(result)
+    
+    if remove_urls:
+        result = _remove_urls(result)
+    
+    if remove_emails:
+        result = remove_email_addresses(result)
+    
+    if normalize:
+        result = normalize_whitespace(result)
+    
+    return result
+
+
+def extract_key_phrases(text: str, min_length: int = 3) -> List[str]:
+    """
+    Extract key phrases from text.
+    
+    Simple heuristic based on capitalized words and common patterns.
+    
+    Args:
+        text: Text to analyze
+        min_length: Minimum phrase length in words
         
-        for sentence in sentences:
-            # Extract capitalized phrases
-            # Pattern: Capitalized word followed by more capitalized words
-            capitalized_pattern = r'\b[A-Z][a-z]+(?:\s+[A-Z][a-z]+)+\b'
+    Returns:
+        List of key phrases
+    """
+    # Split into sentences
+    sentences = _RE_SENTENCE_END.split(text)
+    
+    phrases = []
+    
+    for sentence in sentences:
+        # Extract capitalized phrases
+        # Pattern: Capitalized word followed by more capitalized words
+        for match in _RE_CAPITALIZED_PHRASE.finditer(sentence):
+            phrase = match.group(0)
+            words = phrase.split()
             
-            for match in re.finditer(capitalized_pattern, sentence):
-                phrase = match.group(0)
-                words = phrase.split()
-                
-                if len(words) >= min_length:
-                    phrases.append(phrase)
-        
-        # Remove duplicates while preserving order
-        seen = set()
-        unique_phrases = []
-        
-        for phrase in phrases:
-            if phrase.lower() not in seen:
-                seen.add(phrase.lower())
-                unique_phrases.append(phrase)
-        
-        logger.info(f"Extracted {len(unique_phrases)} key phrase(s)")
-        return unique_phrases
+            if len(words) >= min_length:
+                phrases.append(phrase)
+    
+    # Remove duplicates while preserving order
+    seen = set()
+    unique_phrases = []
+    
+    for phrase in phrases:
+        if phrase.lower() not in seen:
+            seen.add(phrase.lower())
+            unique_phrases.append(phrase)
+    
+    logger.info(f"Extracted {len(unique_phrases)} key phrase(s)")
+    return unique_phrases
+
+
+class DataPreprocessor:
+    """
+    Utility class for cleaning and preprocessing document content.
+    
+    Handles tables, formatting issues, and noise to improve
+    the quality of indexed documents. The methods are the module-level
+    functions, kept here for existing DataPreprocessor.<name> callers.
+    """
+    
+    clean_text = staticmethod(clean_text)
+    normalize_whitespace = staticmethod(normalize_whitespace)
+    remove_urls = staticmethod(remove_urls)
+    remove_email_addresses = staticmethod(remove_email_addresses)
+    extract_tables = staticmethod(extract_tables)
+    format_table_as_text = staticmethod(format_table_as_text)
+    format_table_as_markdown = staticmethod(format_table_as_markdown)
+    extract_code_blocks = staticmethod(extract_code_blocks)
+    remove_code_blocks = staticmethod(remove_code_blocks)
+    extract_headings = staticmethod(extract_headings)
+    split_by_headings = staticmethod(split_by_headings)
+    detect_language = staticmethod(detect_language)
+    preprocess_document = staticmethod(preprocess_document)
+    extract_key_phrases = staticmethod(extract_key_phrases)
+
+
+# Below this many characters in total, sending the batch to worker processes
+# costs more than cleaning it in place (serial cleaning runs at ~10M chars/s)
+_MIN_PARALLEL_CHARS = 500_000
+
+# Workers come from a fork server (spawn where unavailable): forking the
+# multi-threaded application process directly can deadlock on locks held by
+# other threads (FastAPI, Chroma, tokenizers)
+_MP_CONTEXT = multiprocessing.get_context(
+    "forkserver" if "forkserver" in multiprocessing.get_all_start_methods() else "spawn"
+)
+
+# Process pools shared by all batch_preprocess calls, keyed by worker count
+_pools: Dict[int, ProcessPoolExecutor] = {}
+_pools_lock = threading.Lock()
+
+
+def _get_pool(workers: int) -> ProcessPoolExecutor:
+    """Return the shared process pool for a worker count, creating it on first use."""
+    with _pools_lock:
+        pool = _pools.get(workers)
+        if pool is None:
+            pool = ProcessPoolExecutor(max_workers=workers, mp_context=_MP_CONTEXT)
+            _pools[workers] = pool
+        return pool
+
+
+def _preprocess_one(text: str, clean: bool, normalize: bool) -> str:
+    """Process-pool worker: preprocess a single text."""
+    return preprocess_document(text, clean=clean, normalize=normalize)
 
 
 def batch_preprocess(
     texts: List[str],
     clean: bool = True,
     normalize: bool = False,
+    workers: Optional[int] = None,
 ) -> List[str]:
     """
     Preprocess a batch of texts.
     
+    Large batches are spread over a shared process pool, since the cleaning
+    is CPU-bound regex work that threads cannot run in parallel. The pool is
+    started on the first large batch and reused afterwards.
+    
     Args:
         texts: List of texts to preprocess
         clean: Whether to clean text
         normalize: Whether to normalize whitespace
+        workers: Number of worker processes (defaults to CPU count - 1);
+            1 forces serial processing
         
     Returns:
         List of preprocessed texts
     """
     logger.info(f"Batch preprocessing {len(texts)} text(s)")
     
-    results = []
-    for text in texts:
-        result = DataPreprocessor.preprocess_document(
-            text,
-            clean=clean,
-            normalize=normalize
-        )
-        results.append(result)
+    workers = workers or max(1, (os.cpu_count() or 2) - 1)
+    worker = functools.partial(_preprocess_one, clean=clean, normalize=normalize)
+    
+    if workers == 1 or len(texts) < 2 or sum(map(len, texts)) < _MIN_PARALLEL_CHARS:
+        return [worker(text) for text in texts]
     
-    return results
+    pool = _get_pool(workers)
+    chunksize = max(1, len(texts) // (workers * 4))
+    try:
+        return list(pool.map(worker, texts, chunksize=chunksize))
+    except BrokenProcessPool:
+        # A worker died; drop the pool so the next batch starts a fresh one
+        logger.warning("Preprocessing pool broke, processing batch serially")
+        with _pools_lock:
+            if _pools.get(workers) is pool:
+                del _pools[workers]
+        return [worker(text) for text in texts]
@@ -2,31 +2,63 @@
 Nexus Agent Logging Utilities
 """
 
+import atexit
 import logging
+import logging.handlers
 import json
+import queue
 import sys
-from datetime import datetime
-from typing import Dict, Any, Optional
+from functools import lru_cache
+from time import time_ns
+from typing import Dict, Any, Optional, Tuple
 from pathlib import Path
 
-from rich.logging import RichHandler
-from rich.console import Console
+# Compact encoder built once; json.dumps with custom options builds a new
+# JSONEncoder on every call. Entry timestamps are integer nanoseconds since
+# the epoch (UTC), which encode natively
+_encode_entry = json.JSONEncoder(ensure_ascii=False, separators=(',', ':')).encode
 
 
 class NexusLogger:
     """Structured logging for Nexus Agent"""
     
-    def __init__(self, name: str = "nexus", log_file: Optional[str] = None, log_level: str = "INFO"):
+    # Rich console shared by all loggers, created on first use
+    _console = None
+    
+    # Background file listeners, one per (logger name, resolved log file)
+    _file_listeners: Dict[Tuple[str, str], logging.handlers.QueueListener] = {}
+    
+    def __init__(self, name: str = "nexus", log_file: Optional[str] = None, log_level: Optional[str] = None):
+        """
+        Args:
+            name: Logger name; NexusLoggers with the same name share handlers
+            log_file: Optional file to also write to, attached once per path
+            log_level: Level to apply; a new logger defaults to INFO, an
+                existing one keeps its level unless one is given
+        """
         self.logger = logging.getLogger(name)
-        self.logger.setLevel(getattr(logging, log_level.upper()))
         
-        # Clear existing handlers
-        self.logger.handlers.clear()
+        # The first NexusLogger for a name adds the console handler; later
+        # ones reuse it but still apply an explicit level and a new log file
+        if not self.logger.handlers:
+            self._add_console_handler()
+            log_level = log_level or "INFO"
+        
+        if log_level:
+            self.logger.setLevel(getattr(logging, log_level.upper()))
         
-        # Setup console handler with Rich
-        console = Console(stderr=True)
+        self._listener = self._attach_file(log_file) if log_file else None
+    
+    def _add_console_handler(self):
+        """Attach the shared Rich console handler"""
+        # Rich is imported lazily: it is heavy and only needed once a logger is built
+        from rich.console import Console
+        from rich.logging import RichHandler
+        
+        if NexusLogger._console is None:
+            NexusLogger._console = Console(stderr=True)
         console_handler = RichHandler(
-            console=console,
+            console=NexusLogger._console,
             show_time=True,
             show_path=False,
             markup=True,
@@ -39,73 +71,102 @@ class NexusLogger:
         )
         console_handler.setFormatter(console_formatter)
         self.logger.addHandler(console_handler)
+    
+    def _attach_file(self, log_file: str) -> logging.handlers.QueueListener:
+        """Attach a file handler for log_file unless this logger already has one"""
+        log_path = Path(log_file)
+        key = (self.logger.name, str(log_path.resolve()))
+        listener = NexusLogger._file_listeners.get(key)
+        if listener is not None:
+            return listener
+        
+        log_path.parent.mkdir(parents=True, exist_ok=True)
+        
+        file_handler = logging.FileHandler(log_path, encoding='utf-8')
+        file_formatter = logging.Formatter(
+            '%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+        )
+        file_handler.setFormatter(file_formatter)
+        
+        # Disk writes happen on a background listener thread, so callers
+        # never block on file I/O; each record is written as it arrives
+        log_queue = queue.SimpleQueue()
+        self.logger.addHandler(logging.handlers.QueueHandler(log_queue))
+        listener = logging.handlers.QueueListener(
+            log_queue, file_handler, respect_handler_level=True
+        )
+        listener.start()
+        # Registered after logging's own shutdown hook, so it runs first:
+        # the queue is drained before the file handler is closed
+        atexit.register(listener.stop)
         
-        # Setup file handler if specified
-        if log_file:
-            log_path = Path(log_file)
-            log_path.parent.mkdir(parents=True, exist_ok=True)
-            
-            file_handler = logging.FileHandler(log_path, encoding='utf-8')
-            file_formatter = logging.Formatter(
-                '%(asctime)s - %(name)s - %(levelname)s - %(message)s'
-            )
-            file_handler.setFormatter(file_formatter)
-            self.logger.addHandler(file_handler)
+        NexusLogger._file_listeners[key] = listener
+        return listener
     
     def log_conversation(self, user_input: str, agent_response: str, metadata: Dict[str, Any] = None):
         """Log conversation with structured data"""
+        if not self.logger.isEnabledFor(logging.INFO):
+            return
         log_entry = {
-            "timestamp": datetime.utcnow().isoformat(),
+            "timestamp": time_ns(),
             "event_type": "conversation",
             "user_input": user_input,
             "agent_response": agent_response,
             "metadata": metadata or {}
         }
-        self.logger.info(f"🗣️ CONVERSATION: {json.dumps(log_entry, ensure_ascii=False, indent=2)}")
+        self.logger.info(f"🗣️ CONVERSATION: {_encode_entry(log_entry)}")
     
     def log_error(self, error: Exception, context: Dict[str, Any] = None):
         """Log error with context"""
+        if not self.logger.isEnabledFor(logging.ERROR):
+            return
         log_entry = {
-            "timestamp": datetime.utcnow().isoformat(),
+            "timestamp": time_ns(),
             "event_type": "error",
             "error_type": type(error).__name__,
             "error_message": str(error),
             "context": context or {}
         }
-        self.logger.error(f"❌ ERROR: {json.dumps(log_entry, ensure_ascii=False, indent=2)}")
+        self.logger.error(f"❌ ERROR: {_encode_entry(log_entry)}")
     
     def log_llm_call(self, messages: list, response: str, tokens_used: Dict[str, int] = None, duration: float = None):
         """Log LLM API call details"""
+        if not self.logger.isEnabledFor(logging.INFO):
+            return
         log_entry = {
-            "timestamp": datetime.utcnow().isoformat(),
+            "timestamp": time_ns(),
             "event_type": "llm_call",
             "message_count": len(messages),
             "response_length": len(response),
             "tokens_used": tokens_used or {},
             "duration_seconds": duration
         }
-        self.logger.info(f"🤖 LLM_CALL: {json.dumps(log_entry, ensure_ascii=False, indent=2)}")
+        self.logger.info(f"🤖 LLM_CALL: {_encode_entry(log_entry)}")
     
     def log_safety_violation(self, violation_type: str, content: str, action: str):
         """Log safety violations"""
+        if not self.logger.isEnabledFor(logging.WARNING):
+            return
         log_entry = {
-            "timestamp": datetime.utcnow().isoformat(),
+            "timestamp": time_ns(),
             "event_type": "safety_violation",
             "violation_type": violation_type,
             "content": content[:100] + "..." if len(content) > 100 else content,
             "action_taken": action
         }
-        self.logger.warning(f"⚠️ SAFETY: {json.dumps(log_entry, ensure_ascii=False, indent=2)}")
+        self.logger.warning(f"⚠️ SAFETY: {_encode_entry(log_entry)}")
     
     def log_system_event(self, event: str, details: Dict[str, Any] = None):
         """Log system events"""
+        if not self.logger.isEnabledFor(logging.INFO):
+            return
         log_entry = {
-            "timestamp": datetime.utcnow().isoformat(),
+            "timestamp": time_ns(),
             "event_type": "system",
             "event": event,
             "details": details or {}
         }
-        self.logger.info(f"🔧 SYSTEM: {json.dumps(log_entry, ensure_ascii=False, indent=2)}")
+        self.logger.info(f"🔧 SYSTEM: {_encode_entry(log_entry)}")
     
     def debug(self, message: str, **kwargs):
         """Debug level logging"""
@@ -125,6 +186,7 @@ class NexusLogger:
 
 
 # Global logger instance
+@lru_cache(maxsize=None)
 def get_logger(name: str = "nexus") -> NexusLogger:
     """Get or create a logger instance"""
-    return NexusLogger(name)
\ No newline at end of file
+    return NexusLogger(name)
@@ -6,6 +6,78 @@ import re
 from typing import List, Tuple, Optional
 from dataclasses import dataclass
 
+# Optional Aho-Corasick automaton for multi-literal matching
+try:
+    import ahocorasick
+    _ahocorasick_available = True
+except ImportError:
+    ahocorasick = None
+    _ahocorasick_available = False
+
+# Linear-time RE2 engine for patterns run against untrusted text, if installed
+try:
+    import re2 as _regex_engine
+    _re2_available = True
+except ImportError:
+    _regex_engine = re
+    _re2_available = False
+
+# A pattern made only of (?i) and plain words, optionally as one (a|b|c) group
+_LITERAL_PATTERN = re.compile(r"^(?:\(\?i\))?\(?([\w ]+(?:\|[\w ]+)*)\)?$")
+
+
+def _build_automaton(words: List[str]):
+    """Build a case-insensitive Aho-Corasick automaton, or None if unavailable/empty"""
+    if not _ahocorasick_available or not words:
+        return None
+    automaton = ahocorasick.Automaton()
+    for word in words:
+        automaton.add_word(word.lower(), word)
+    automaton.make_automaton()
+    return automaton
+
+
+def _split_literal_patterns(patterns: List[str]) -> Tuple[List[str], List[str]]:
+    """
+    Split patterns into plain literals and genuine regexes
+    
+    Literals are only split out when an automaton can match them; otherwise
+    every pattern stays a regex.
+    """
+    if not _ahocorasick_available:
+        return [], list(patterns)
+    
+    literals, regexes = [], []
+    for pattern in patterns:
+        match = _LITERAL_PATTERN.match(pattern)
+        if match:
+            literals.extend(match.group(1).split("|"))
+        else:
+            regexes.append(pattern)
+    return literals, regexes
+
+
+def _alternation(patterns: List[str]) -> str:
+    """Join patterns into one alternation, dropping their (?i) prefixes"""
+    return "|".join(f"(?:{pattern.removeprefix('(?i)')})" for pattern in patterns)
+
+
+def _union_regex(patterns: List[str]):
+    """
+    Compile case-insensitive patterns into one alternation, or None if empty
+    
+    Uses RE2 when available so matching user input stays linear in its
+    length; the patterns avoid backreferences and lookarounds for that reason.
+    """
+    if not patterns:
+        return None
+    return _regex_engine.compile("(?i)" + _alternation(patterns))
+
+
+def _automaton_matches(automaton, text_lower: str) -> bool:
+    """Whether any automaton needle occurs in the lowercased text"""
+    return automaton is not None and next(automaton.iter(text_lower), None) is not None
+
 
 @dataclass
 class ValidationResult:
@@ -60,6 +132,26 @@ class InputValidator:
             "会议", "截止日期", "政策", "流程", "福利", "培训",
             "入职", "办公室", "部门", "经理", "报告", "文档"
         ]
+        
+        # Literal needles go through one automaton pass per family; the
+        # remaining patterns are searched as one union regex per family
+        self._pattern_families = []
+        for patterns, reason in [
+            (self.prompt_injection_patterns, "检测到潜在的提示注入攻击"),
+            (self.sensitive_patterns, "请求涉及敏感信息"),
+            (self.inappropriate_patterns, "请求包含不当内容"),
+        ]:
+            literals, regexes = _split_literal_patterns(patterns)
+            self._pattern_families.append(
+                (_build_automaton(literals), _union_regex(regexes), reason)
+            )
+        
+        # Without an automaton, all keywords are matched by one literal
+        # alternation instead of a Python-level loop over them
+        self._work_automaton = _build_automaton(self.work_keywords)
+        self._work_keywords_re = re.compile(
+            "|".join(re.escape(keyword.lower()) for keyword in self.work_keywords)
+        )
     
     def validate_input(self, user_input: str) -> ValidationResult:
         """Validate user input against safety patterns"""
@@ -70,30 +162,15 @@ class InputValidator:
                 action="block"
             )
         
-        # Check for prompt injection attempts
-        for pattern in self.prompt_injection_patterns:
-            if re.search(pattern, user_input):
+        # Check prompt injection, sensitive information and inappropriate
+        # content, in that order
+        input_lower = user_input.lower()
+        for automaton, regex, reason in self._pattern_families:
+            if (_automaton_matches(automaton, input_lower)
+                    or (regex is not None and regex.search(user_input))):
                 return ValidationResult(
                     is_valid=False,
-                    reason="检测到潜在的提示注入攻击",
-                    action="block"
-                )
-        
-        # Check for sensitive information requests
-        for pattern in self.sensitive_patterns:
-            if re.search(pattern, user_input):
-                return ValidationResult(
-                    is_valid=False,
-                    reason="请求涉及敏感信息",
-                    action="block"
-                )
-        
-        # Check for inappropriate content
-        for pattern in self.inappropriate_patterns:
-            if re.search(pattern, user_input):
-                return ValidationResult(
-                    is_valid=False,
-                    reason="请求包含不当内容",
+                    reason=reason,
                     action="block"
                 )
         
@@ -114,7 +191,9 @@ class InputValidator:
     def _is_work_related(self, text: str) -> bool:
         """Check if text contains work-related keywords"""
         text_lower = text.lower()
-        return any(keyword.lower() in text_lower for keyword in self.work_keywords)
+        if self._work_automaton is not None:
+            return _automaton_matches(self._work_automaton, text_lower)
+        return self._work_keywords_re.search(text_lower) is not None
 
 
 class OutputValidator:
@@ -135,6 +214,23 @@ class OutputValidator:
         self.required_patterns = [
             r"(?i)(nexus|助手|assistant)",
         ]
+        
+        # Phrases that make a response acceptable without a persona mention
+        self.appropriate_indicators = [
+            "抱歉", "无法", "不能", "建议", "请", "谢谢", "帮助",
+            "policy", "政策", "流程", "部门", "联系", "咨询"
+        ]
+        
+        # Forbidden, persona and indicator patterns fused into one scan.
+        # Forbidden alternatives come first, so at any position where several
+        # match the forbidden one wins
+        self._forbidden_re = _union_regex(self.forbidden_patterns)
+        self._output_scan_re = _regex_engine.compile(
+            "(?i)(?P<forbidden>" + _alternation(self.forbidden_patterns) + ")|"
+            + _alternation(self.required_patterns + [
+                re.escape(indicator) for indicator in self.appropriate_indicators
+            ])
+        )
     
     def validate_output(self, agent_output: str) -> ValidationResult:
         """Validate agent output against safety patterns"""
@@ -145,39 +241,35 @@ class OutputValidator:
                 action="block"
             )
         
-        # Check for forbidden content
-        for pattern in self.forbidden_patterns:
-            if re.search(pattern, agent_output):
-                return ValidationResult(
-                    is_valid=False,
-                    reason="输出包含不当内容",
-                    action="block"
-                )
-        
-        # Check if output maintains appropriate persona (for longer responses)
-        if len(agent_output) > 50:  # Only check longer responses
-            has_persona = any(re.search(pattern, agent_output) for pattern in self.required_patterns)
-            if not has_persona and not self._is_appropriate_response(agent_output):
+        # Only longer responses must keep the persona; shorter ones are only
+        # checked for forbidden content
+        if len(agent_output) > 50:
+            match = self._output_scan_re.search(agent_output)
+            if match is None:
                 return ValidationResult(
                     is_valid=False,
                     reason="输出未保持适当的助手角色",
                     action="block"
                 )
+            if match.group("forbidden") is None:
+                # Persona or indicator found first: nothing forbidden starts
+                # before it, so resume the forbidden scan right after its start
+                match = self._forbidden_re.search(agent_output, match.start() + 1)
+        else:
+            match = self._forbidden_re.search(agent_output)
+        
+        if match is not None:
+            return ValidationResult(
+                is_valid=False,
+                reason="输出包含不当内容",
+                action="block"
+            )
         
         return ValidationResult(
             is_valid=True,
             reason="输出验证通过",
             action="allow"
         )
-    
-    def _is_appropriate_response(self, text: str) -> bool:
-        """Check if response is appropriate even without explicit persona mentions"""
-        appropriate_indicators = [
-            "抱歉", "无法", "不能", "建议", "请", "谢谢", "帮助",
-            "policy", "政策", "流程", "部门", "联系", "咨询"
-        ]
-        text_lower = text.lower()
-        return any(indicator in text_lower for indicator in appropriate_indicators)
 
 
 class MessageHandler:
@@ -0,0 +1,60 @@
+"""
+Sprint 4 测试的共享 fixtures
+"""
+
+import os
+from typing import Optional
+
+import pytest
+
+from nexus_agent.config.settings import config
+
+
+# 设置 PYTEST_REDIS_DB 时测试独占该 Redis 数据库，清理时直接 FLUSHDB；
+# 并行时工作进程依次使用它及其下方的数据库（15、14、13…）
+TEST_REDIS_DB = os.getenv("PYTEST_REDIS_DB")
+
+
+def _test_redis_db(worker_id: Optional[str]) -> int:
+    """测试使用的 Redis 数据库编号，pytest-xdist 工作进程（gw0、gw1…）各用一个"""
+    if not TEST_REDIS_DB:
+        # 不猜测其他数据库编号：未配置的数据库可能属于其他应用
+        if worker_id:
+            raise pytest.UsageError(
+                "并行运行（pytest -n）需要设置 PYTEST_REDIS_DB，为每个工作进程分配独占的 Redis 数据库"
+            )
+        return config.redis_db
+
+    # 独占的数据库会被清空，不能回绕到其他应用使用的数据库
+    db = int(TEST_REDIS_DB) - (int(worker_id[2:]) if worker_id else 0)
+    if db < 0:
+        raise pytest.UsageError(
+            f"PYTEST_REDIS_DB={TEST_REDIS_DB} 不足以分配给工作进程 {worker_id}"
+        )
+    return db
+
+
+@pytest.fixture(scope="session", autouse=True)
+def redis_worker_db():
+    """
+    让测试使用独立的 Redis 数据库
+
+    并行运行（pytest -n auto）时必须设置 PYTEST_REDIS_DB，每个工作进程使用
+    不同的数据库。必须在任何 Redis 客户端创建之前生效：全局连接池在首次
+    get_redis_client() 时按 config.redis_db 建立。
+    """
+    worker_id = os.environ.get("PYTEST_XDIST_WORKER")
+    db = _test_redis_db(worker_id)
+    if db == config.redis_db:
+        yield db
+        return
+
+    with pytest.MonkeyPatch.context() as mp:
+        mp.setattr(config, "redis_db", db)
+        yield config.redis_db
+
+
+@pytest.fixture(scope="session")
+def flush_redis_db() -> bool:
+    """测试是否独占 Redis 数据库；独占时清理直接 FLUSHDB，否则只删除测试创建的键"""
+    return bool(TEST_REDIS_DB)
@@ -11,41 +11,60 @@ Sprint 4: 记忆管理与多轮对话 - 综合测试脚本
 7. 会话管理操作
 """
 
+import asyncio
+import os
 import pytest
-import time
-import uuid
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Iterator
 from datetime import datetime
 
 # 导入 Sprint 4 组件
-from nexus_agent.storage.redis_client import RedisClient
+from nexus_agent.storage.redis_client import RedisClient, get_redis_client
 from nexus_agent.storage.session_manager import SessionManager
 from nexus_agent.storage.context_manager import ContextManager
 from nexus_agent.agent.agent import NexusLangChainAgent
 
 
+def _short_id_pool(batch: int = 128) -> Iterator[str]:
+    """8 位十六进制短 ID：每次读取一批随机字节再切分，而不是每个 ID 调用一次 uuid4()"""
+    while True:
+        pool = os.urandom(4 * batch).hex()
+        for start in range(0, len(pool), 8):
+            yield pool[start:start + 8]
+
+
+_short_ids = _short_id_pool()
+
+# 本模块 Redis 客户端测试创建的会话 ID 前缀，清理时只扫描这些键
+TEST_SESSION_PREFIX = f"test_session_{next(_short_ids)}_"
+
+# 设置 PYTEST_FAST_TOKENS=1 时，上下文管理器测试按字符数估算 Token，跳过 tiktoken 编码
+FAST_TOKENS = bool(os.getenv("PYTEST_FAST_TOKENS"))
+
+
 class TestRedisClient:
     """测试 Redis 客户端功能"""
     
-    @pytest.fixture
-    def redis_client(self):
-        """创建 Redis 客户端实例"""
-        client = RedisClient()
+    @pytest.fixture(scope="module")
+    def redis_client(self, flush_redis_db):
+        """创建 Redis 客户端实例（模块内共享，复用全局连接池）"""
+        client = RedisClient(connection_pool=get_redis_client().pool)
         yield client
-        # 清理测试数据 - 删除所有测试会话
-        all_sessions = client.get_all_sessions()
-        for session in all_sessions:
-            client.delete_session(session['session_id'])
+        if flush_redis_db:
+            client.client.flushdb()
+            return
+        # 清理测试数据 - SCAN 出本模块的会话和历史，通过管道一次性删除
+        session_ids = set(client.iter_session_ids(TEST_SESSION_PREFIX))
+        session_ids.update(client.iter_session_ids(TEST_SESSION_PREFIX, keyspace="history"))
+        client.delete_sessions_bulk(list(session_ids))
     
     def test_redis_connection(self, redis_client):
         """测试 Redis 连接"""
         # RedisClient 在初始化时已经测试连接
         assert redis_client.client is not None, "Redis 客户端未初始化"
-        print("✅ Redis 连接测试通过")
     
     def test_save_and_get_session(self, redis_client):
         """测试保存和获取会话"""
-        session_id = f"test_session_{uuid.uuid4().hex[:8]}"
+        session_id = f"{TEST_SESSION_PREFIX}{next(_short_ids)}"
         session_data = {
             "session_id": session_id,
             "user_id": "test_user",
@@ -61,11 +80,10 @@ class TestRedisClient:
         result = redis_client.get_session(session_id)
         assert result is not None, "获取会话失败"
         assert result.get('session_id') == session_id, "会话 ID 不匹配"
-        print("✅ Redis save/get session 测试通过")
     
     def test_conversation_history(self, redis_client):
         """测试对话历史"""
-        session_id = f"test_session_{uuid.uuid4().hex[:8]}"
+        session_id = f"{TEST_SESSION_PREFIX}{next(_short_ids)}"
         
         # 添加消息
         redis_client.add_message(session_id, "user", "你好")
@@ -76,11 +94,10 @@ class TestRedisClient:
         assert len(history) == 2, f"期望 2 条消息，实际 {len(history)} 条"
         assert history[0]['role'] == 'user', "第一条消息应该是用户消息"
         assert history[1]['role'] == 'assistant', "第二条消息应该是助手消息"
-        print("✅ Redis conversation history 测试通过")
     
     def test_delete_session(self, redis_client):
         """测试删除会话"""
-        session_id = f"test_session_{uuid.uuid4().hex[:8]}"
+        session_id = f"{TEST_SESSION_PREFIX}{next(_short_ids)}"
         session_data = {"session_id": session_id}
         
         # 保存会话
@@ -91,11 +108,10 @@ class TestRedisClient:
         success = redis_client.delete_session(session_id)
         assert success == True, "删除会话失败"
         assert redis_client.get_session(session_id) is None, "删除后会话应该不存在"
-        print("✅ Redis delete session 测试通过")
     
     def test_clear_history(self, redis_client):
         """测试清空历史"""
-        session_id = f"test_session_{uuid.uuid4().hex[:8]}"
+        session_id = f"{TEST_SESSION_PREFIX}{next(_short_ids)}"
         
         # 添加消息
         redis_client.add_message(session_id, "user", "消息1")
@@ -107,25 +123,35 @@ class TestRedisClient:
         
         history = redis_client.get_conversation_history(session_id)
         assert len(history) == 0, "清空后历史应该为空"
-        print("✅ Redis clear history 测试通过")
 
 
 class TestSessionManager:
     """测试会话管理器功能"""
     
-    @pytest.fixture
-    def session_manager(self):
-        """创建会话管理器实例"""
+    @pytest.fixture(scope="module")
+    def session_manager(self, flush_redis_db):
+        """创建会话管理器实例（模块内共享），记录创建的会话，结束后只删除这些会话"""
         manager = SessionManager()
-        yield manager
+        session_ids = []
+        create_session = manager.create_session
+        
+        def recording_create_session(*args, **kwargs):
+            session_id = create_session(*args, **kwargs)
+            session_ids.append(session_id)
+            return session_id
+        
+        with pytest.MonkeyPatch.context() as mp:
+            mp.setattr(manager, "create_session", recording_create_session)
+            yield manager
+        if flush_redis_db:
+            manager.redis.client.flushdb()
+            return
         # 清理测试数据
-        all_sessions = manager.redis.get_all_sessions()
-        for session in all_sessions:
-            manager.delete_session(session['session_id'])
+        manager.redis.delete_sessions_bulk(session_ids)
     
     def test_create_session(self, session_manager):
         """测试创建会话"""
-        user_id = f"test_user_{uuid.uuid4().hex[:8]}"
+        user_id = f"test_user_{next(_short_ids)}"
         
         # 创建会话
         session_id = session_manager.create_session(user_id=user_id)
@@ -138,11 +164,10 @@ class TestSessionManager:
         session_data = session_manager.get_session(session_id)
         assert session_data is not None, "会话数据不能为空"
         assert session_data.get('user_id') == user_id, "用户 ID 不匹配"
-        print(f"✅ 创建会话测试通过 (Session ID: {session_id})")
     
     def test_get_session(self, session_manager):
         """测试获取会话"""
-        user_id = f"test_user_{uuid.uuid4().hex[:8]}"
+        user_id = f"test_user_{next(_short_ids)}"
         session_id = session_manager.create_session(user_id=user_id)
         
         # 获取会话
@@ -153,11 +178,10 @@ class TestSessionManager:
         assert session_data.get('user_id') == user_id, "用户 ID 不匹配"
         assert 'created_at' in session_data, "缺少创建时间"
         assert 'message_count' in session_data, "缺少消息计数"
-        print("✅ 获取会话测试通过")
     
     def test_add_message(self, session_manager):
         """测试添加消息"""
-        user_id = f"test_user_{uuid.uuid4().hex[:8]}"
+        user_id = f"test_user_{next(_short_ids)}"
         session_id = session_manager.create_session(user_id=user_id)
         
         # 添加用户消息
@@ -172,35 +196,37 @@ class TestSessionManager:
         assert len(messages) == 2, f"期望 2 条消息，实际 {len(messages)} 条"
         assert messages[0]['role'] == 'user', "第一条消息应该是用户消息"
         assert messages[1]['role'] == 'assistant', "第二条消息应该是助手消息"
-        print("✅ 添加消息测试通过")
     
     def test_get_messages(self, session_manager):
         """测试获取消息历史"""
-        user_id = f"test_user_{uuid.uuid4().hex[:8]}"
+        user_id = f"test_user_{next(_short_ids)}"
         session_id = session_manager.create_session(user_id=user_id)
         
         # 添加多条消息
-        for i in range(5):
-            role = 'user' if i % 2 == 0 else 'assistant'
-            session_manager.add_message(session_id, role, f'测试消息 {i+1}')
+        session_manager.add_messages_bulk(session_id, [
+            {'role': 'user' if i % 2 == 0 else 'assistant', 'content': f'测试消息 {i+1}'}
+            for i in range(5)
+        ])
         
         # 获取所有消息
         messages = session_manager.get_conversation_history(session_id)
         assert len(messages) == 5, f"期望 5 条消息，实际 {len(messages)} 条"
+        assert messages[0]['content'] == '测试消息 1', "消息顺序应该与添加顺序一致"
+        assert session_manager.get_session(session_id)['message_count'] == 5, "消息计数不匹配"
         
         # 获取前 3 条消息
         messages_limited = session_manager.get_conversation_history(session_id, limit=3)
         assert len(messages_limited) == 3, f"期望 3 条消息，实际 {len(messages_limited)} 条"
-        print("✅ 获取消息历史测试通过")
     
     def test_clear_session(self, session_manager):
         """测试清空会话"""
-        user_id = f"test_user_{uuid.uuid4().hex[:8]}"
+        user_id = f"test_user_{next(_short_ids)}"
         session_id = session_manager.create_session(user_id=user_id)
         
         # 添加消息
-        for i in range(3):
-            session_manager.add_message(session_id, "user", f'测试消息 {i+1}')
+        session_manager.add_messages_bulk(session_id, [
+            {'role': 'user', 'content': f'测试消息 {i+1}'} for i in range(3)
+        ])
         
         # 清空会话
         session_manager.clear_history(session_id)
@@ -208,11 +234,56 @@ class TestSessionManager:
         # 验证消息已清空
         messages = session_manager.get_conversation_history(session_id)
         assert len(messages) == 0, "清空后消息数应该为 0"
-        print("✅ 清空会话测试通过")
+    
+    def test_history_cache_sees_other_writers(self, session_manager):
+        """测试本地历史副本能感知其他进程的写入和清空"""
+        user_id = f"test_user_{next(_short_ids)}"
+        session_id = session_manager.create_session(user_id=user_id)
+        other_manager = SessionManager()
+        
+        session_manager.add_message(session_id, "user", "消息 1")
+        assert len(session_manager.get_conversation_history(session_id)) == 1, "期望 1 条消息"
+        
+        # 另一个管理器（模拟其他进程）追加消息
+        other_manager.add_message(session_id, "assistant", "消息 2")
+        messages = session_manager.get_conversation_history(session_id)
+        assert [m['content'] for m in messages] == ['消息 1', '消息 2'], "应读取到其他进程新增的消息"
+        
+        # 另一个管理器清空历史
+        other_manager.clear_history(session_id)
+        assert session_manager.get_conversation_history(session_id) == [], "清空后本地副本应失效"
+    
+    def test_history_cache_push_during_read(self, session_manager, monkeypatch):
+        """测试读取历史的两步之间有其他写入时，本地副本不会重复或遗漏消息"""
+        user_id = f"test_user_{next(_short_ids)}"
+        session_id = session_manager.create_session(user_id=user_id)
+        other_manager = SessionManager()
+        
+        session_manager.add_message(session_id, "user", "消息 1")
+        session_manager.get_conversation_history(session_id)
+        other_manager.add_message(session_id, "assistant", "消息 2")
+        
+        # 读取历史序号之后、读取新增消息之前，另一个写入者插入一条消息
+        redis = session_manager.redis
+        get_history_seq = redis.get_history_seq
+        
+        def get_history_seq_then_push(sid):
+            seq = get_history_seq(sid)
+            monkeypatch.setattr(redis, "get_history_seq", get_history_seq)
+            other_manager.add_message(sid, "user", "消息 3")
+            return seq
+        
+        monkeypatch.setattr(redis, "get_history_seq", get_history_seq_then_push)
+        session_manager.get_conversation_history(session_id)
+        
+        expected = ['消息 1', '消息 2', '消息 3']
+        for _ in range(2):
+            messages = session_manager.get_conversation_history(session_id)
+            assert [m['content'] for m in messages] == expected, "本地副本与 Redis 中的历史不一致"
     
     def test_delete_session(self, session_manager):
         """测试删除会话"""
-        user_id = f"test_user_{uuid.uuid4().hex[:8]}"
+        user_id = f"test_user_{next(_short_ids)}"
         session_id = session_manager.create_session(user_id=user_id)
         
         # 添加消息
@@ -224,29 +295,24 @@ class TestSessionManager:
         # 验证会话已删除
         session_data = session_manager.get_session(session_id)
         assert session_data is None, "删除后会话数据应该为 None"
-        print("✅ 删除会话测试通过")
     
     def test_list_sessions(self, session_manager):
         """测试列出所有会话"""
-        user_id = f"test_user_{uuid.uuid4().hex[:8]}"
+        user_id = f"test_user_{next(_short_ids)}"
         
         # 创建多个会话
-        session_ids = []
-        for i in range(3):
-            session_id = session_manager.create_session(user_id=user_id)
-            session_ids.append(session_id)
+        session_ids = [session_manager.create_session(user_id=user_id) for _ in range(3)]
         
         # 列出会话
         sessions = session_manager.get_user_sessions(user_id=user_id)
         
         assert len(sessions) == 3, f"期望 3 个会话，实际 {len(sessions)} 个"
         assert all(s['session_id'] in session_ids for s in sessions), "会话 ID 不匹配"
-        print("✅ 列出会话测试通过")
     
     def test_session_isolation(self, session_manager):
         """测试会话隔离"""
-        user_a = f"user_a_{uuid.uuid4().hex[:8]}"
-        user_b = f"user_b_{uuid.uuid4().hex[:8]}"
+        user_a = f"user_a_{next(_short_ids)}"
+        user_b = f"user_b_{next(_short_ids)}"
         
         # 创建两个用户的会话
         session_a = session_manager.create_session(user_id=user_a)
@@ -266,45 +332,42 @@ class TestSessionManager:
         assert len(messages_b) == 1, f"用户 B 应该有 1 条消息，实际 {len(messages_b)} 条"
         assert messages_a[0]['content'] == '用户 A 的消息', "用户 A 的消息内容不匹配"
         assert messages_b[0]['content'] == '用户 B 的消息', "用户 B 的消息内容不匹配"
-        print("✅ 会话隔离测试通过")
 
 
 class TestContextManager:
     """测试上下文管理器功能"""
     
-    @pytest.fixture
+    @pytest.fixture(scope="module")
     def context_manager(self):
         """创建上下文管理器实例"""
         manager = ContextManager()
+        if FAST_TOKENS:
+            # 与 tiktoken 编码不可用时相同的估算路径
+            manager.encoding = None
         yield manager
         # ContextManager doesn't need cleanup
     
     def test_manage_context_within_limit(self, context_manager):
         """测试上下文在限制范围内"""
         # 添加少量消息（不超过限制）
-        messages = []
-        for i in range(3):
-            messages.append({
-                'role': 'user',
-                'content': f'短消息 {i+1}'
-            })
+        messages = [{'role': 'user', 'content': f'短消息 {i+1}'} for i in range(3)]
         
         # 检查是否超限
         is_over_budget, current_tokens = context_manager.check_token_budget(messages)
         
         # 应该未超限
         assert is_over_budget == False, "少量消息不应该超限"
-        print(f"✅ 上下文未超限测试通过 (Token 数: {current_tokens})")
     
     def test_context_compression(self, context_manager):
         """测试上下文压缩"""
         # 添加大量消息（超过限制）
-        messages = []
-        for i in range(20):
-            messages.append({
+        messages = [
+            {
                 'role': 'user' if i % 2 == 0 else 'assistant',
                 'content': f'这是一条较长的测试消息，用于测试上下文压缩功能。消息编号：{i+1}。'
-            })
+            }
+            for i in range(20)
+        ]
         
         # 检查是否超限
         is_over_budget, current_tokens = context_manager.check_token_budget(messages)
@@ -315,9 +378,6 @@ class TestContextManager:
             
             # 应该返回压缩后的消息（少于原始消息）
             assert len(compressed_messages) < len(messages), "应该进行上下文压缩"
-            print(f"✅ 上下文压缩测试通过 (原始: {len(messages)} 条, 压缩后: {len(compressed_messages)} 条)")
-        else:
-            print("✅ 上下文未超限，无需压缩")
     
     def test_token_counting(self, context_manager):
         """测试 Token 计数"""
@@ -326,7 +386,6 @@ class TestContextManager:
         
         assert token_count > 0, "Token 计数应该大于 0"
         assert isinstance(token_count, int), "Token 计数应该是整数"
-        print(f"✅ Token 计数测试通过 (文本: '{test_text}', Token 数: {token_count})")
     
     def test_context_summary(self, context_manager):
         """测试上下文摘要"""
@@ -344,27 +403,79 @@ class TestContextManager:
         assert summary_messages is not None, "摘要不能为空"
         assert isinstance(summary_messages, list), "摘要应该是列表"
         assert len(summary_messages) > 0, "摘要长度应该大于 0"
-        print(f"✅ 上下文摘要测试通过 (摘要消息数: {len(summary_messages)})")
+    
+    def test_evict_context(self, context_manager):
+        """测试发送前的上下文精简"""
+        long_reply = '报销流程如下：' + '提交申请并附上发票。' * 50
+        messages = [
+            {
+                'role': 'user' if i % 2 == 0 else 'assistant',
+                'content': long_reply if i % 2 else f'第 {i+1} 条用户消息',
+                'timestamp': datetime.now().isoformat(),
+                'metadata': {'tool_calls': [], 'duration': 1.0}
+            }
+            for i in range(20)
+        ]
+        
+        evicted = context_manager.evict_context(messages, keep_recent=10)
+        
+        assert len(evicted) == len(messages), "精简不应删除消息"
+        assert all(set(m) <= {'role', 'content', '_archived'} for m in evicted), "元数据应被移除"
+        assert evicted[1].get('_archived') and len(evicted[1]['content']) < len(long_reply), "旧的助手回复应被归档"
+        assert evicted[0]['content'] == messages[0]['content'], "用户消息应保持完整"
+        assert evicted[-1]['content'] == long_reply, "最近的消息应保持完整"
+        assert context_manager.evict_context(evicted, keep_recent=10) == evicted, "精简应是幂等的"
+
+
+# 设置 PYTEST_LLM_CACHE=1 时，Agent 测试的 LLM 请求通过 pytest-recording (vcrpy) 录制/回放：
+# 请求体（系统提示词 + 历史消息 + 用户消息）相同则直接复用录制的响应，新的请求追加录制
+llm_cache = pytest.mark.vcr if os.getenv("PYTEST_LLM_CACHE") else pytest.mark.usefixtures()
+
 
+@pytest.fixture(scope="module")
+def vcr_config():
+    """VCR 配置：过滤 API Key，按请求体匹配，未录制的请求照常发出并追加录制"""
+    return {
+        "filter_headers": ["authorization"],
+        "match_on": ["method", "scheme", "host", "port", "path", "query", "body"],
+        "record_mode": "new_episodes",
+    }
 
+
+@pytest.fixture(scope="module")
+def agent():
+    """创建启用记忆的 Agent 实例（模块内共享，各测试使用独立会话）"""
+    return NexusLangChainAgent(
+        provider="deepseek",
+        model="deepseek-chat",
+        temperature=0.7,
+        enable_memory=True
+    )
+
+
+@pytest.fixture
+def agent_sessions(agent, monkeypatch):
+    """记录本测试通过 Agent 创建的会话，测试结束后通过管道一次性删除"""
+    session_ids = []
+    process_message = agent.process_message
+    
+    def recording_process_message(*args, **kwargs):
+        response = process_message(*args, **kwargs)
+        if response.session_id:
+            session_ids.append(response.session_id)
+        return response
+    
+    # process_message_async 也经由实例属性调用，同样会被记录
+    monkeypatch.setattr(agent, "process_message", recording_process_message)
+    yield session_ids
+    agent.session_manager.redis.delete_sessions_bulk(list(dict.fromkeys(session_ids)))
+
+
+@llm_cache
+@pytest.mark.usefixtures("agent_sessions")
 class TestAgentMemoryIntegration:
     """测试 Agent 记忆集成"""
     
-    @pytest.fixture
-    def agent(self):
-        """创建启用记忆的 Agent 实例"""
-        agent = NexusLangChainAgent(
-            provider="deepseek",
-            model="deepseek-chat",
-            temperature=0.7,
-            enable_memory=True
-        )
-        yield agent
-        # 清理测试数据
-        all_sessions = agent.session_manager.redis.get_all_sessions()
-        for session in all_sessions:
-            agent.session_manager.delete_session(session['session_id'])
-    
     def test_agent_with_memory_enabled(self, agent):
         """测试启用记忆的 Agent"""
         # 第一次对话
@@ -373,7 +484,6 @@ class TestAgentMemoryIntegration:
         
         assert session_id is not None, "会话 ID 不能为空"
         assert response1.content is not None, "响应内容不能为空"
-        print(f"✅ 第一次对话测试通过 (Session ID: {session_id})")
         
         # 第二次对话（测试记忆）
         response2 = agent.process_message("我叫什么名字？", session_id=session_id)
@@ -381,27 +491,31 @@ class TestAgentMemoryIntegration:
         assert response2.content is not None, "响应内容不能为空"
         # Agent 应该记住名字
         assert "李四" in response2.content or "李" in response2.content, "Agent 应该记住用户名字"
-        print("✅ Agent 记忆测试通过")
     
     def test_multi_user_sessions(self, agent):
-        """测试多用户会话"""
-        # 用户 A 的会话
-        response_a1 = agent.process_message("我是用户A，我是工程师", user_id="user_a")
+        """测试多用户会话（两个用户的对话并发进行）"""
+        async def user_flow(user_id: str, introduction: str):
+            # 同一用户的两轮对话按顺序进行
+            first = await agent.process_message_async(introduction, user_id=user_id)
+            second = await agent.process_message_async(
+                "我的职位是什么？", session_id=first.session_id, user_id=user_id
+            )
+            return first, second
+        
+        async def run_user_flows():
+            return await asyncio.gather(
+                user_flow("user_a", "我是用户A，我是工程师"),
+                user_flow("user_b", "我是用户B，我是设计师"),
+            )
+        
+        (response_a1, response_a2), (response_b1, response_b2) = asyncio.run(run_user_flows())
         session_a = response_a1.session_id
-        
-        response_a2 = agent.process_message("我的职位是什么？", session_id=session_a, user_id="user_a")
-        
-        # 用户 B 的会话
-        response_b1 = agent.process_message("我是用户B，我是设计师", user_id="user_b")
         session_b = response_b1.session_id
         
-        response_b2 = agent.process_message("我的职位是什么？", session_id=session_b, user_id="user_b")
-        
         # 验证两个会话独立
         assert session_a != session_b, "不同用户的会话 ID 应该不同"
         assert "工程师" in response_a2.content or "工程师" in response_a1.content, "用户 A 应该是工程师"
         assert "设计师" in response_b2.content or "设计师" in response_b1.content, "用户 B 应该是设计师"
-        print("✅ 多用户会话测试通过")
     
     def test_conversation_history(self, agent):
         """测试对话历史"""
@@ -416,7 +530,6 @@ class TestAgentMemoryIntegration:
         
         assert history is not None, "对话历史不能为空"
         assert len(history) >= 3, f"期望至少 3 条消息，实际 {len(history)} 条"
-        print(f"✅ 对话历史测试通过 (历史消息数: {len(history)})")
     
     def test_session_info(self, agent):
         """测试会话信息"""
@@ -432,7 +545,6 @@ class TestAgentMemoryIntegration:
         assert 'message_count' in session_info, "缺少消息计数"
         assert 'created_at' in session_info, "缺少创建时间"
         assert session_info['message_count'] >= 2, f"期望至少 2 条消息，实际 {session_info['message_count']} 条"
-        print(f"✅ 会话信息测试通过 (消息数: {session_info['message_count']})")
     
     def test_clear_session(self, agent):
         """测试清空会话"""
@@ -448,7 +560,6 @@ class TestAgentMemoryIntegration:
         # 验证会话已清空
         history = agent.get_conversation_history(session_id)
         assert len(history) == 0, f"清空后消息数应该为 0，实际 {len(history)} 条"
-        print("✅ 清空会话测试通过")
     
     def test_delete_session(self, agent):
         """测试删除会话"""
@@ -460,27 +571,13 @@ class TestAgentMemoryIntegration:
         # 验证会话已删除
         session_info = agent.get_session_info(session_id)
         assert session_info is None, "删除后会话信息应该为 None"
-        print("✅ 删除会话测试通过")
 
 
+@llm_cache
+@pytest.mark.usefixtures("agent_sessions")
 class TestMemoryManagementIntegration:
     """测试记忆管理集成"""
     
-    @pytest.fixture
-    def agent(self):
-        """创建启用记忆的 Agent 实例"""
-        agent = NexusLangChainAgent(
-            provider="deepseek",
-            model="deepseek-chat",
-            temperature=0.7,
-            enable_memory=True
-        )
-        yield agent
-        # 清理测试数据
-        all_sessions = agent.session_manager.redis.get_all_sessions()
-        for session in all_sessions:
-            agent.session_manager.delete_session(session['session_id'])
-    
     def test_long_conversation_with_compression(self, agent):
         """测试长对话的上下文压缩"""
         session_id = agent.process_message("你好，我是测试用户", user_id="test_user").session_id
@@ -496,7 +593,6 @@ class TestMemoryManagementIntegration:
         # 验证历史消息数量（可能因为压缩而减少）
         assert history is not None, "对话历史不能为空"
         assert len(history) > 0, "应该有历史消息"
-        print(f"✅ 长对话上下文压缩测试通过 (历史消息数: {len(history)})")
     
     def test_session_persistence(self, agent):
         """测试会话持久化"""
@@ -509,15 +605,14 @@ class TestMemoryManagementIntegration:
         history1 = agent.get_conversation_history(session_id)
         count1 = len(history1)
         
-        # 等待一下（模拟时间流逝）
-        time.sleep(1)
+        # 写入是同步的，一次 PING 往返足以确认之前的命令都已被服务端处理
+        assert agent.session_manager.redis.client.ping(), "Redis 连接不可用"
         
         # 再次获取历史（应该从 Redis 持久化存储中读取）
         history2 = agent.get_conversation_history(session_id)
         count2 = len(history2)
         
         assert count1 == count2, f"持久化前后消息数应该一致 ({count1} vs {count2})"
-        print("✅ 会话持久化测试通过")
     
     def test_concurrent_sessions(self, agent):
         """测试并发会话"""
@@ -536,7 +631,6 @@ class TestMemoryManagementIntegration:
             history = agent.get_conversation_history(session_id)
             assert len(history) >= 2, f"用户{i+1}的会话应该至少有2条消息"
         
-        print("✅ 并发会话测试通过")
 
 
 def run_all_tests():